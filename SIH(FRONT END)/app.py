@@ -1,21 +1,73 @@
-from flask import Flask, render_template, send_from_directory, request, jsonify
+from flask import Flask, Response, render_template, send_from_directory, send_file, request, jsonify, stream_with_context, g, has_request_context
 from flask_pymongo import PyMongo
 from flask_mail import Mail, Message
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.local import LocalProxy
+from werkzeug.security import safe_join
 import os
-import bcrypt
-from datetime import datetime
+import time
+import hashlib
+import hmac
+import math
+import mimetypes
+import atexit
+import threading
+import queue
+import uuid
+import logging
+import re
+from collections import Counter, deque
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone
 from bson import ObjectId
+from pymongo import CursorType, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError
+from gazetteer import Gazetteer, geojson_point, normalize_coordinates, normalize_location
+from severity import SeverityRules
+from counters import increment_stats, ensure_stats, counter_key, STATS_ID
+from photo_store import PhotoStore, PhotoError, PHOTO_HASH_PATTERN
+from passwords import hash_password, check_password, needs_rehash, PasswordPoolBusy
+from auth_tokens import TokenSigner, TokenError, RevocationList, shared_secret_key, AUTH_TOKEN_SECONDS
+from build_assets import page_paths, precompress
+from metrics import RequestMetrics, MetricsMiddleware, UNMATCHED_ROUTE
+from db_monitor import CommandMonitor, merge_snapshots, SLOW_QUERY_MS
+from log_config import setup_logging, LOGGER_NAME
 import json
+import numpy as np
+from functools import lru_cache, wraps
 
 app = Flask(__name__, 
             template_folder='.', 
             static_folder='.',
             static_url_path='')
 
-# MongoDB Configuration
+# Logging goes through a queue to a writer thread as JSON lines (see log_config.py)
+logger = logging.getLogger(LOGGER_NAME)
+
+def log_context():
+    """Fields added to every record logged while handling a request"""
+    if not has_request_context():
+        return None
+    context = {
+        'requestId': g.get('request_id'),
+        'route': request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE,
+        'method': request.method
+    }
+    started = g.get('request_started')
+    if started is not None:
+        context['elapsedMs'] = round((time.perf_counter() - started) * 1000, 1)
+    return context
+
+setup_logging(log_context)
+
+# MongoDB Configuration - the client is created per process in create_app()
 app.config['MONGO_URI'] = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/disaster_alert_db')
-mongo = PyMongo(app)
+mongo = PyMongo()
+
+# Session tokens are signed with SECRET_KEY. Set it in production; without it
+# a generated key is stored in MongoDB and shared by all workers (see create_app)
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')
 
 # Admin Configuration
 ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'smartindiahackathon72@gmail.com')
@@ -30,46 +82,149 @@ app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME', SYSTEM_EMAIL)
 # IMPORTANT: Use Gmail App Password, not regular password
 # Get App Password from: https://support.google.com/accounts/answer/185833
 app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD', '')  # Leave empty - must be set via environment
-print("🔧 Using Gmail SMTP for email delivery (requires App Password)")
+logger.info("Using Gmail SMTP for email delivery (requires App Password)")
 
 app.config['MAIL_DEFAULT_SENDER'] = SYSTEM_EMAIL
 
 # Initialize Mail
 mail = Mail(app)
 
+# Every request is timed by the metrics middleware; /api/metrics sums all workers
+request_metrics = RequestMetrics()
+app.wsgi_app = MetricsMiddleware(app.wsgi_app, request_metrics)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+@app.before_request
+def record_request_route():
+    """Label the request's metrics with its URL rule, not the raw path"""
+    request_metrics.started(request.environ, request.url_rule.rule if request.url_rule else None)
+
+# Each request is logged once when it completes; an incoming X-Request-ID is kept
+REQUEST_ID_PATTERN = re.compile(r'[\w.-]{1,64}')
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', '1000'))
+
+@app.before_request
+def start_request_log():
+    """Give the request an id that every log record it produces carries"""
+    request_id = request.headers.get('X-Request-ID', '')
+    g.request_id = request_id if REQUEST_ID_PATTERN.fullmatch(request_id) else uuid.uuid4().hex
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def log_request(response):
+    """Log the completed request: errors and slow requests always, the rest sampled"""
+    request_id = g.get('request_id')
+    if request_id is None:
+        return response
+    response.headers['X-Request-ID'] = request_id
+    duration_ms = (time.perf_counter() - g.get('request_started', time.perf_counter())) * 1000
+    fields = {'status': response.status_code, 'durationMs': round(duration_ms, 1)}
+    if response.status_code >= 500:
+        logger.error("Request failed", extra=fields)
+    elif duration_ms >= SLOW_REQUEST_MS:
+        logger.warning("Slow request", extra=fields)
+    else:
+        logger.info("Request completed", extra=dict(fields, sampled=True))
+    return response
+
+def command_route():
+    """Name what issued a MongoDB command: the request's URL rule or the background thread"""
+    if has_request_context():
+        return request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+    return f'thread:{threading.current_thread().name}'
+
+# Every MongoDB command is timed and grouped by query shape and route (see db_monitor.py)
+command_monitor = CommandMonitor(command_route)
+request_metrics.add_source('db', command_monitor.snapshot)
+DB_STATS_DEFAULT_LIMIT = 50
+DB_STATS_MAX_LIMIT = 500
+
 # Email configuration validation
 def validate_email_config():
     """Validate Gmail SMTP configuration and provide helpful feedback"""
     config_issues = []
     
     if not app.config['MAIL_PASSWORD']:
-        config_issues.append("❌ MAIL_PASSWORD not set - Gmail App Password required")
+        config_issues.append("MAIL_PASSWORD not set - Gmail App Password required")
     
     if not app.config['MAIL_USERNAME']:
-        config_issues.append("❌ MAIL_USERNAME not set")
+        config_issues.append("MAIL_USERNAME not set")
     
     if config_issues:
-        print("\n🚨 EMAIL CONFIGURATION ISSUES:")
-        for issue in config_issues:
-            print(f"  {issue}")
-        print("\n📚 Gmail App Password Setup:")
-        print("   1. Go to https://myaccount.google.com/security")
-        print("   2. Enable 2-Step Verification")
-        print("   3. Generate App Password for 'Mail'")
-        print("   4. Use 16-character App Password (not regular password)")
-        print("🔧 Set: $env:MAIL_PASSWORD='your-16-char-app-password'")
+        logger.warning(
+            "Email configuration issues, emails will not be sent. Gmail needs a 16-character "
+            "App Password: enable 2-Step Verification at https://myaccount.google.com/security, "
+            "generate an App Password for 'Mail' and set MAIL_PASSWORD to it",
+            extra={'issues': config_issues}
+        )
         return False
     else:
-        print("✅ Email configuration appears valid (Gmail SMTP)")
+        logger.info("Email configuration appears valid (Gmail SMTP)")
         return True
 
 # Check email config on startup
 email_config_valid = validate_email_config()
 
-# Initialize collections
-reports_collection = mongo.db.reports
-users_collection = mongo.db.users
-contacts_collection = mongo.db.contacts
+# Load the place gazetteer once; lookups are a single trie scan per location
+gazetteer = Gazetteer.load()
+logger.info("Gazetteer loaded: %d places", gazetteer.size)
+
+# Report photos live in a content-addressed store; reports keep only references
+photo_store = PhotoStore()
+PHOTO_CACHE_SECONDS = 365 * 24 * 60 * 60
+
+# build_assets.py writes bundled, content-hashed assets and the pages that load
+# them to dist/; without a build the source css/ and js/ files are served
+ASSET_BUILD_DIR = os.path.join(app.root_path, 'dist')
+ASSET_DIR = os.path.join(ASSET_BUILD_DIR, 'assets')
+ASSET_CACHE_SECONDS = 365 * 24 * 60 * 60
+PRECOMPRESSED_ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+def load_built_pages():
+    """Pages that have a built copy in dist/, from the build manifest"""
+    try:
+        with open(os.path.join(ASSET_BUILD_DIR, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        logger.info("No asset build found, serving source css/ and js/ (run build_assets.py)")
+        return set()
+    logger.info("Asset build from %s: %d bundles", manifest.get('builtAt'), len(manifest['assets']))
+    return set(manifest['pages'])
+
+built_pages = load_built_pages()
+
+# Severity rules are compiled once and recompiled when data/severity_rules.json changes
+severity_rules = SeverityRules()
+
+# Collections resolve against the current process's client (see create_app)
+def collection(name):
+    return LocalProxy(lambda: mongo.db[name])
+
+reports_collection = collection('reports')
+users_collection = collection('users')
+contacts_collection = collection('contacts')
+outbox_collection = collection('email_outbox')
+geocode_cache_collection = collection('geocode_cache')
+stats_collection = collection('stats')
+revoked_tokens_collection = collection('revoked_tokens')
+live_events_collection = collection('live_events')
+
+# Geocodes are cached in MongoDB (shared across processes and restarts) with an
+# in-process LRU in front of it
+GEOCODE_CACHE_SIZE = int(os.environ.get('GEOCODE_CACHE_SIZE', '4096'))
+# Pinned (hand-corrected) entries bypass the LRU and are re-read this often
+GEOCODE_PINNED_SECONDS = float(os.environ.get('GEOCODE_PINNED_SECONDS', '60'))
+
+# Write versions are re-read from MongoDB at most this often per process
+VERSION_CACHE_SECONDS = float(os.environ.get('VERSION_CACHE_SECONDS', '1'))
+
+# New reports are counted per map tile at this zoom so heatmap tiles are
+# only rebuilt where something changed
+TILE_VERSION_ZOOM = 6
+
+# Pagination cursors encode timestamps as milliseconds since the Unix epoch
+EPOCH = datetime(1970, 1, 1)
+PAGE_MAX_LIMIT = 200
 
 # Helper functions
 def serialize_mongo_doc(doc):
@@ -79,99 +234,462 @@ def serialize_mongo_doc(doc):
     doc['_id'] = str(doc['_id'])
     return doc
 
-def hash_password(password):
-    """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+def mongo_now():
+    """Current UTC time truncated to the millisecond precision MongoDB stores"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
 
-def check_password(password, hashed):
-    """Check password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed)
+def encode_cursor(sort_value, doc_id):
+    """Encode a (sort value, _id) pair into an opaque pagination token; a None sort value is kept as empty"""
+    millis = '' if sort_value is None else int((sort_value - EPOCH).total_seconds() * 1000)
+    payload = f'{millis}:{doc_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
 
-def send_email_to_admin(subject, sender_name, sender_email, message_body, contact_subject):
-    """Send email notification to admin about new contact message"""
+def decode_cursor(token):
+    """Decode a pagination token back into (datetime or None, ObjectId), or None if invalid"""
     try:
-        # Check email configuration first
-        if not email_config_valid:
-            print("❌ Email not sent - configuration invalid")
-            return False
-        
-        print(f"📧 Attempting to send email to {ADMIN_EMAIL}")
-        print(f"📧 SMTP Server: {app.config['MAIL_SERVER']}:{app.config['MAIL_PORT']}")
-        print(f"📧 Username: {app.config['MAIL_USERNAME']}")
-        print(f"📧 Password configured: {'Yes' if app.config['MAIL_PASSWORD'] else 'No'}")
-        
-        # Create email message
-        msg = Message(
-            subject=f'[Disaster Alert System] New Contact: {subject}',
-            recipients=[ADMIN_EMAIL],
-            reply_to=sender_email
-        )
+        padded = token + '=' * (-len(token) % 4)
+        millis, doc_id = base64.urlsafe_b64decode(padded).decode('utf-8').split(':')
+        if not ObjectId.is_valid(doc_id):
+            return None
+        sort_value = EPOCH + timedelta(milliseconds=int(millis)) if millis else None
+        return sort_value, ObjectId(doc_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+def page_cursor(doc, sort_field):
+    """Cursor for the page after doc, or None if its sort value cannot be encoded"""
+    sort_value = doc.get(sort_field)
+    if sort_value is not None and not isinstance(sort_value, datetime):
+        return None
+    return encode_cursor(sort_value, doc['_id'])
+
+def keyset_page(collection, query, sort_field, limit, after=None, projection=None):
+    """Fetch one page ordered by (sort_field, _id) descending, starting after a cursor.
+
+    Documents without the sort field sort last and are paged by _id alone.
+    Returns the serialized documents and the cursor for the next page (None on
+    the last page). Backed by the compound indexes in create_pagination_indexes().
+    """
+    if after:
+        sort_value, last_id = after
+        if sort_value is None:
+            after_filter = {sort_field: None, '_id': {'$lt': last_id}}
+        else:
+            after_filter = {'$or': [
+                {sort_field: {'$lt': sort_value}},
+                {sort_field: sort_value, '_id': {'$lt': last_id}},
+                {sort_field: None}
+            ]}
+        query = {'$and': [query, after_filter]}
+
+    docs = list(collection.find(query, projection)
+                .sort([(sort_field, -1), ('_id', -1)])
+                .limit(limit + 1))
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = page_cursor(docs[-1], sort_field)
+
+    return [serialize_mongo_doc(doc) for doc in docs], next_cursor
+
+# Report fields that can be requested with ?fields=a,b,c
+REPORT_FIELDS = {
+    'name', 'location', 'disasterType', 'description', 'coordinates', 'geocodeSource',
+    'address', 'photos', 'timestamp', 'status', 'verified', 'severity', 'computedSeverity',
+    'severityRulesVersion', 'contactInfo', 'reporterIP', 'userAgent', 'lastUpdated'
+}
+
+# Reporter details that are never sent from public map endpoints
+PRIVATE_REPORT_FIELDS = {'address', 'contactInfo', 'reporterIP', 'userAgent'}
+
+# Named views selectable with ?view=; None means the whole document
+REPORT_VIEWS = {
+    'map': ('disasterType', 'location', 'description', 'coordinates', 'severity',
+            'status', 'verified', 'timestamp'),
+    'list': ('name', 'disasterType', 'location', 'description', 'coordinates', 'photos',
+             'severity', 'computedSeverity', 'status', 'verified', 'timestamp', 'lastUpdated'),
+    'full': None
+}
+
+def requested_report_fields(default_view, public=False):
+    """Resolve ?fields= or ?view= into (field list or None for all fields, error message)"""
+    fields_arg = request.args.get('fields')
+    if fields_arg:
+        fields = tuple(field.strip() for field in fields_arg.split(',') if field.strip())
+        unknown = sorted(set(fields) - REPORT_FIELDS)
+        if unknown:
+            return None, f"Unknown fields: {', '.join(unknown)}"
+    else:
+        view = request.args.get('view', default_view)
+        if view not in REPORT_VIEWS:
+            return None, f"Unknown view: {view}"
+        fields = REPORT_VIEWS[view]
+    
+    if public and (fields is None or PRIVATE_REPORT_FIELDS.intersection(fields)):
+        return None, 'Requested fields are not available on this endpoint'
+    
+    return fields, None
+
+def fields_projection(fields):
+    """MongoDB projection for a field list (None keeps the whole document)"""
+    if fields is None:
+        return None
+    return {field: 1 for field in fields}
+
+def paginated_response(collection, query, sort_field, items_key, default_limit, projection=None):
+    """Build a paginated list response in cursor mode (?after=) or offset mode (?page=)"""
+    try:
+        limit = min(max(int(request.args.get('limit', default_limit)), 1), PAGE_MAX_LIMIT)
+        page = int(request.args.get('page', 1))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'limit and page must be integers'
+        }), 400
+    if page < 1:
+        return jsonify({
+            'success': False,
+            'error': 'page must be 1 or greater'
+        }), 400
+
+    # Cursors are built from the sort field and _id, so fetch them even when
+    # ?fields= leaves them out, and drop them again from the response
+    hidden = ()
+    if projection and any(projection.values()):
+        hidden = tuple(field for field in (sort_field, '_id') if not projection.get(field, field == '_id'))
+        projection = dict(projection, **{field: 1 for field in hidden})
+
+    def visible(items):
+        for item in items:
+            for field in hidden:
+                item.pop(field, None)
+        return items
+
+    # Cursor mode: ?after=<token> (empty token means the first page)
+    if 'after' in request.args:
+        after = None
+        if request.args['after']:
+            after = decode_cursor(request.args['after'])
+            if after is None:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid cursor'
+                }), 400
+
+        items, next_cursor = keyset_page(collection, query, sort_field, limit, after, projection)
+        return jsonify({
+            'success': True,
+            items_key: visible(items),
+            'limit': limit,
+            'nextCursor': next_cursor
+        })
+
+    # Offset mode, kept for older clients
+    skip = (page - 1) * limit
+
+    docs = list(collection.find(query, projection)
+                .sort([(sort_field, -1), ('_id', -1)])
+                .skip(skip).limit(limit))
+
+    next_cursor = None
+    if len(docs) == limit:
+        next_cursor = page_cursor(docs[-1], sort_field)
+
+    total_count = collection.count_documents(query)
+
+    return jsonify({
+        'success': True,
+        items_key: visible([serialize_mongo_doc(doc) for doc in docs]),
+        'total': total_count,
+        'page': page,
+        'limit': limit,
+        'pages': (total_count + limit - 1) // limit,
+        'nextCursor': next_cursor
+    })
+
+class CollectionVersions:
+    """Process-local copy of the per-collection write versions on the stats document.
+
+    Writes in this process update it immediately; writes in other processes
+    are picked up within VERSION_CACHE_SECONDS.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.epoch = None
+        self.versions = {}
+        self.modified = {}
+        self.tiles = {}
+        self.loaded_at = None
+
+    def update(self, doc):
+        """Replace the cached values with a stats document's epoch/versions/modified/tiles"""
+        with self.lock:
+            self.epoch = doc.get('epoch')
+            self.versions = doc.get('versions', {})
+            self.modified = doc.get('modified', {})
+            self.tiles = doc.get('tiles', {})
+            self.loaded_at = time.monotonic()
+
+    def refresh(self):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > VERSION_CACHE_SECONDS:
+            doc = stats_collection.find_one(
+                {'_id': STATS_ID},
+                {'epoch': 1, 'versions': 1, 'modified': 1, 'tiles': 1}
+            )
+            self.update(doc or {})
+
+    def snapshot(self):
+        """Return (epoch, versions, modified), refreshing from MongoDB when stale"""
+        self.refresh()
+        with self.lock:
+            return self.epoch, self.versions, self.modified
+
+    def tile_version(self, z, x, y):
+        """Number of reports added inside tile z/x/y, counted on its zoom-6 tiles"""
+        self.refresh()
+        with self.lock:
+            tiles = self.tiles
+        if z >= TILE_VERSION_ZOOM:
+            shift = z - TILE_VERSION_ZOOM
+            return tiles.get(f'{x >> shift}_{y >> shift}', 0)
+        
+        shift = TILE_VERSION_ZOOM - z
+        total = 0
+        for key, count in tiles.items():
+            tile_x, tile_y = (int(part) for part in key.split('_'))
+            if (tile_x >> shift, tile_y >> shift) == (x, y):
+                total += count
+        return total
+
+collection_versions = CollectionVersions()
+
+def bump_stats(increments, touched=()):
+    """Update dashboard counters and the write versions of the touched collections.
+
+    Never fails the request; counters.py fixes any counter drift.
+    """
+    try:
+        doc = increment_stats(mongo.db, increments, touched)
+        if doc is not None:
+            collection_versions.update(doc)
+    except Exception as e:
+        logger.warning("Dashboard counter update failed: %s", e)
+
+def conditional_get(*collections, time_bucket=None):
+    """Answer If-None-Match / If-Modified-Since from write versions before the view runs.
+
+    The ETag covers the path, query string and the versions of the collections
+    the response is built from. time_bucket (seconds) is for responses that
+    also change with the clock; those get no Last-Modified.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                epoch, versions, modified = collection_versions.snapshot()
+            except Exception as e:
+                logger.warning("Write versions unavailable, serving without ETag: %s", e)
+                return view(*args, **kwargs)
+            
+            parts = [request.path, request.query_string.decode('latin-1'), str(epoch)]
+            parts += [f'{name}:{versions.get(name, 0)}' for name in collections]
+            if time_bucket:
+                parts.append(str(int(time.time() // time_bucket)))
+            etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20]
+            
+            last_modified = None
+            if not time_bucket:
+                times = [modified[name] for name in collections if name in modified]
+                if times:
+                    last_modified = max(times).replace(tzinfo=timezone.utc, microsecond=0)
+            
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = bool(last_modified and since and last_modified <= since)
+            
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+def password_busy_response():
+    """503 for when the password worker pool is saturated"""
+    response = jsonify({
+        'success': False,
+        'error': 'Server is busy, please try again shortly'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = '2'
+    return response
+
+token_signer = TokenSigner()
+revocations = RevocationList(revoked_tokens_collection)
+
+def authenticate_request():
+    """Return (claims, error) for the request's Bearer token without touching the users collection"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None, 'Authentication required'
+    try:
+        claims = token_signer.verify(token.strip())
+    except TokenError as e:
+        return None, str(e)
+    
+    # The revocation list is reloaded only when its write version changes
+    try:
+        _, versions, _ = collection_versions.snapshot()
+        revocations.sync(versions.get('revoked_tokens', 0))
+    except Exception as e:
+        logger.warning("Revocation list refresh failed, using cached list: %s", e)
+    if revocations.is_revoked(claims['jti']):
+        return None, 'Token has been revoked'
+    return claims, None
+
+# Registration always creates a citizen; these roles are requested and granted on verification
+USER_TYPES = {'citizen', 'official', 'admin'}
+PRIVILEGED_USER_TYPES = {'official', 'admin'}
+ROLE_REQUEST_FIELDS = ('officialId', 'department', 'designation')
+
+def require_auth(*roles):
+    """Require a valid Bearer token, with one of roles if any are given; claims go on g.auth"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            claims, error = authenticate_request()
+            if error:
+                response = jsonify({
+                    'success': False,
+                    'error': error
+                })
+                response.status_code = 401
+                response.headers['WWW-Authenticate'] = 'Bearer'
+                return response
+            if roles and claims['role'] not in roles:
+                return jsonify({
+                    'success': False,
+                    'error': 'Insufficient permissions'
+                }), 403
+            # Role-gated routes also need an account an admin has verified
+            if roles and not claims.get('verified'):
+                return jsonify({
+                    'success': False,
+                    'error': 'Account not verified'
+                }), 403
+            
+            g.auth = claims
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def build_admin_email(subject, sender_name, sender_email, message_body, contact_subject):
+    """Build the admin notification message for a contact submission"""
+    # Create email message
+    msg = Message(
+        subject=f'[Disaster Alert System] New Contact: {subject}',
+        recipients=[ADMIN_EMAIL],
+        reply_to=sender_email
+    )
+    
+    # Email body with HTML formatting
+    msg.html = f"""
+    <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+        <div style="background: linear-gradient(135deg, #1565C0 0%, #42a5f5 100%); color: white; padding: 20px; border-radius: 8px 8px 0 0;">
+            <h2 style="margin: 0; font-size: 24px;">🚨 New Contact Message</h2>
+            <p style="margin: 5px 0 0 0; opacity: 0.9;">Disaster Alert System</p>
+        </div>
         
-        # Email body with HTML formatting
-        msg.html = f"""
-        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: linear-gradient(135deg, #1565C0 0%, #42a5f5 100%); color: white; padding: 20px; border-radius: 8px 8px 0 0;">
-                <h2 style="margin: 0; font-size: 24px;">🚨 New Contact Message</h2>
-                <p style="margin: 5px 0 0 0; opacity: 0.9;">Disaster Alert System</p>
+        <div style="background: #f8f9fa; padding: 20px; border-radius: 0 0 8px 8px; border: 1px solid #e9ecef;">
+            <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 15px;">
+                <h3 style="color: #1565C0; margin-top: 0;">Contact Details</h3>
+                <p><strong>Name:</strong> {sender_name}</p>
+                <p><strong>Email:</strong> <a href="mailto:{sender_email}">{sender_email}</a></p>
+                <p><strong>Subject Category:</strong> {contact_subject.title()}</p>
+                <p><strong>Time:</strong> {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC</p>
             </div>
             
-            <div style="background: #f8f9fa; padding: 20px; border-radius: 0 0 8px 8px; border: 1px solid #e9ecef;">
-                <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 15px;">
-                    <h3 style="color: #1565C0; margin-top: 0;">Contact Details</h3>
-                    <p><strong>Name:</strong> {sender_name}</p>
-                    <p><strong>Email:</strong> <a href="mailto:{sender_email}">{sender_email}</a></p>
-                    <p><strong>Subject Category:</strong> {contact_subject.title()}</p>
-                    <p><strong>Time:</strong> {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC</p>
-                </div>
-                
-                <div style="background: white; padding: 20px; border-radius: 8px;">
-                    <h3 style="color: #1565C0; margin-top: 0;">Message</h3>
-                    <div style="background: #f8f9fa; padding: 15px; border-left: 4px solid #1565C0; border-radius: 4px;">
-                        <p style="margin: 0; line-height: 1.6;">{message_body}</p>
-                    </div>
-                </div>
-                
-                <div style="margin-top: 20px; padding: 15px; background: #e3f2fd; border-radius: 8px; border-left: 4px solid #2196f3;">
-                    <p style="margin: 0; font-size: 14px; color: #1565C0;">
-                        <strong>Quick Actions:</strong> Reply directly to this email to respond to {sender_name}, or access the admin dashboard to manage all contact messages.
-                    </p>
+            <div style="background: white; padding: 20px; border-radius: 8px;">
+                <h3 style="color: #1565C0; margin-top: 0;">Message</h3>
+                <div style="background: #f8f9fa; padding: 15px; border-left: 4px solid #1565C0; border-radius: 4px;">
+                    <p style="margin: 0; line-height: 1.6;">{message_body}</p>
                 </div>
             </div>
+            
+            <div style="margin-top: 20px; padding: 15px; background: #e3f2fd; border-radius: 8px; border-left: 4px solid #2196f3;">
+                <p style="margin: 0; font-size: 14px; color: #1565C0;">
+                    <strong>Quick Actions:</strong> Reply directly to this email to respond to {sender_name}, or access the admin dashboard to manage all contact messages.
+                </p>
+            </div>
         </div>
-        """
-        
-        # Text version for email clients that don't support HTML
-        msg.body = f"""
-        New Contact Message - Disaster Alert System
-        
-        Contact Details:
-        Name: {sender_name}
-        Email: {sender_email}
-        Subject: {contact_subject.title()}
-        Time: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC
-        
-        Message:
-        {message_body}
+    </div>
+    """
+    
+    # Text version for email clients that don't support HTML
+    msg.body = f"""
+    New Contact Message - Disaster Alert System
+    
+    Contact Details:
+    Name: {sender_name}
+    Email: {sender_email}
+    Subject: {contact_subject.title()}
+    Time: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC
+    
+    Message:
+    {message_body}
+    
+    Reply directly to this email to respond to the sender.
+    """
+    
+    return msg
+
+def explain_email_error(e):
+    """Log setup guidance for common SMTP failures"""
+    error_msg = str(e).lower()
+    if 'authentication failed' in error_msg or 'username and password not accepted' in error_msg:
+        logger.info("Solution: Check Gmail App Password in EMAIL_SETUP.md")
+    elif 'connection' in error_msg:
+        logger.info("Solution: Check internet connection and firewall settings")
+    elif 'timeout' in error_msg:
+        logger.info("Solution: Check network connectivity to smtp.gmail.com:587")
+
+def send_email_to_admin(subject, sender_name, sender_email, message_body, contact_subject):
+    """Send email notification to admin about new contact message"""
+    try:
+        # Check email configuration first
+        if not email_config_valid:
+            logger.warning("Email not sent - configuration invalid")
+            return False
         
-        Reply directly to this email to respond to the sender.
-        """
+        logger.debug(
+            "Sending email to %s via %s:%s as %s (password configured: %s)",
+            ADMIN_EMAIL, app.config['MAIL_SERVER'], app.config['MAIL_PORT'],
+            app.config['MAIL_USERNAME'], 'yes' if app.config['MAIL_PASSWORD'] else 'no'
+        )
         
         # Send the email
-        mail.send(msg)
-        print("✅ Email sent successfully to admin!")
+        mail.send(build_admin_email(subject, sender_name, sender_email, message_body, contact_subject))
+        logger.info("Email sent to admin")
         return True
         
     except Exception as e:
-        error_msg = str(e).lower()
-        print(f"❌ Failed to send email to admin: {e}")
+        logger.exception("Failed to send email to admin")
         
         # Provide specific error guidance
-        if 'authentication failed' in error_msg or 'username and password not accepted' in error_msg:
-            print("🔧 Solution: Check Gmail App Password in EMAIL_SETUP.md")
-        elif 'connection' in error_msg:
-            print("🔧 Solution: Check internet connection and firewall settings")
-        elif 'timeout' in error_msg:
-            print("🔧 Solution: Check network connectivity to smtp.gmail.com:587")
+        explain_email_error(e)
         
         return False
 
@@ -180,14 +698,320 @@ def create_report_index():
     try:
         reports_collection.create_index([("timestamp", -1)])
         reports_collection.create_index([("status", 1)])
-        reports_collection.create_index([("type", 1)])
         reports_collection.create_index([("location", "text")])
-        print("📊 Database indexes created successfully")
+        reports_collection.create_index([("geo", "2dsphere"), ("timestamp", -1)])
+        # Reports have no 'type' field; the type filter uses (disasterType, timestamp, _id)
+        if 'type_1' in reports_collection.index_information():
+            reports_collection.drop_index('type_1')
+        logger.info("Database indexes created")
+    except Exception as e:
+        logger.warning("Index creation failed: %s", e)
+
+def create_pagination_indexes():
+    """Create compound (sort field, _id) indexes backing keyset pagination"""
+    try:
+        reports_collection.create_index([("timestamp", -1), ("_id", -1)])
+        reports_collection.create_index([("status", 1), ("timestamp", -1), ("_id", -1)])
+        reports_collection.create_index([("disasterType", 1), ("timestamp", -1), ("_id", -1)])
+        contacts_collection.create_index([("timestamp", -1), ("_id", -1)])
+        contacts_collection.create_index([("status", 1), ("timestamp", -1), ("_id", -1)])
+        users_collection.create_index([("createdAt", -1), ("_id", -1)])
+        logger.info("Pagination indexes created")
+    except Exception as e:
+        logger.warning("Pagination index creation failed: %s", e)
+
+# Email outbox - contact notifications are queued in MongoDB and delivered by
+# background workers so request threads never wait on SMTP
+EMAIL_WORKERS = int(os.environ.get('EMAIL_WORKERS', '2'))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', '6'))
+EMAIL_RETRY_BASE_SECONDS = int(os.environ.get('EMAIL_RETRY_BASE_SECONDS', '30'))
+EMAIL_POLL_SECONDS = int(os.environ.get('EMAIL_POLL_SECONDS', '15'))
+SMTP_IDLE_TIMEOUT_SECONDS = int(os.environ.get('SMTP_IDLE_TIMEOUT_SECONDS', '60'))
+# A job stuck in 'sending' longer than this (worker crashed) is picked up again
+EMAIL_LOCK_TIMEOUT_SECONDS = 300
+
+outbox_wakeup = threading.Event()
+outbox_shutdown = threading.Event()
+email_worker_threads = []
+
+def create_user_indexes():
+    """Create user indexes; the unique email index is what keeps registration race-free"""
+    try:
+        users_collection.create_index([("email", 1)], unique=True)
+        users_collection.create_index([("verified", 1)])
+        logger.info("User indexes created")
     except Exception as e:
-        print(f"⚠️ Index creation failed: {e}")
+        logger.warning("User index creation failed (duplicate emails?): %s", e)
+
+def create_auth_indexes():
+    """Create the TTL index that drops revoked tokens once they would have expired anyway"""
+    try:
+        revoked_tokens_collection.create_index([("expiresAt", 1)], expireAfterSeconds=0)
+    except Exception as e:
+        logger.warning("Revoked token index creation failed: %s", e)
+
+def create_outbox_indexes():
+    """Create indexes used by outbox workers to claim due jobs"""
+    try:
+        outbox_collection.create_index([("status", 1), ("nextAttemptAt", 1)])
+        outbox_collection.create_index([("contactId", 1)])
+    except Exception as e:
+        logger.warning("Outbox index creation failed: %s", e)
+
+def enqueue_admin_email(contact_id, contact):
+    """Queue an admin notification for a saved contact message"""
+    now = datetime.utcnow()
+    outbox_collection.insert_one({
+        'contactId': contact_id,
+        'payload': {
+            'subject': contact['subject'],
+            'sender_name': contact['name'],
+            'sender_email': contact['email'],
+            'message_body': contact['message'],
+            'contact_subject': contact['subject']
+        },
+        'status': 'queued',
+        'attempts': 0,
+        'createdAt': now,
+        'nextAttemptAt': now,
+        'lastError': None
+    })
+    if not email_config_valid:
+        logger.warning("Email is not configured: admin notification queued but will not be sent",
+                       extra={'contactId': str(contact_id)})
+    outbox_wakeup.set()
+
+def claim_outbox_job():
+    """Atomically claim the next due outbox job, or return None"""
+    now = datetime.utcnow()
+    return outbox_collection.find_one_and_update(
+        {'$or': [
+            {'status': {'$in': ['queued', 'retry']}, 'nextAttemptAt': {'$lte': now}},
+            {'status': 'sending', 'lockedAt': {'$lt': now - timedelta(seconds=EMAIL_LOCK_TIMEOUT_SECONDS)}}
+        ]},
+        {'$set': {'status': 'sending', 'lockedAt': now}, '$inc': {'attempts': 1}},
+        sort=[('nextAttemptAt', 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+def record_outbox_result(job, error=None):
+    """Store the delivery outcome on the outbox job and its contact message"""
+    now = datetime.utcnow()
+    if error is None:
+        outbox_collection.update_one(
+            {'_id': job['_id']},
+            {'$set': {'status': 'sent', 'sentAt': now, 'lastError': None}, '$unset': {'lockedAt': ''}}
+        )
+        contacts_collection.update_one(
+            {'_id': job['contactId']},
+            {'$set': {'emailSent': True, 'emailSentAt': now}}
+        )
+        bump_stats({}, touched=('contacts',))
+        return
+
+    if job['attempts'] >= EMAIL_MAX_ATTEMPTS:
+        outbox_collection.update_one(
+            {'_id': job['_id']},
+            {'$set': {'status': 'failed', 'failedAt': now, 'lastError': str(error)}, '$unset': {'lockedAt': ''}}
+        )
+        contacts_collection.update_one(
+            {'_id': job['contactId']},
+            {'$set': {'emailSent': False, 'emailSentAt': None}}
+        )
+        bump_stats({}, touched=('contacts',))
+        return
+
+    # Exponential backoff: base, 2x base, 4x base, ...
+    delay = EMAIL_RETRY_BASE_SECONDS * (2 ** (job['attempts'] - 1))
+    outbox_collection.update_one(
+        {'_id': job['_id']},
+        {'$set': {
+            'status': 'retry',
+            'nextAttemptAt': now + timedelta(seconds=delay),
+            'lastError': str(error)
+        }, '$unset': {'lockedAt': ''}}
+    )
+
+def record_outbox_sent(job):
+    """Mark a delivered job as sent; returns False if MongoDB could not be updated"""
+    try:
+        record_outbox_result(job)
+        return True
+    except Exception:
+        logger.exception("Outbox email was sent but recording it failed", extra={'jobId': str(job['_id'])})
+        return False
+
+def outbox_backlog():
+    """Count outbox jobs not yet delivered and the age of the oldest one"""
+    pending = {'status': {'$in': ['queued', 'retry', 'sending']}}
+    oldest = outbox_collection.find_one(pending, {'createdAt': 1}, sort=[('createdAt', 1)])
+    return {
+        'pending': outbox_collection.count_documents(pending),
+        'failed': outbox_collection.count_documents({'status': 'failed'}),
+        'oldestPendingSeconds': int((datetime.utcnow() - oldest['createdAt']).total_seconds()) if oldest else None,
+        'workersRunning': bool(email_worker_threads)
+    }
+
+class SMTPSession:
+    """A Flask-Mail connection kept open across jobs and reopened when idle or broken"""
+
+    def __init__(self):
+        self.connection = None
+        self.last_used = 0
+
+    def send(self, msg):
+        if self.connection is not None and time.monotonic() - self.last_used > SMTP_IDLE_TIMEOUT_SECONDS:
+            self.close()
+        if self.connection is None:
+            self.connection = mail.connect().__enter__()
+        try:
+            self.connection.send(msg)
+        except Exception:
+            # The server may have dropped us; reconnect on the next job
+            self.close()
+            raise
+        self.last_used = time.monotonic()
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.__exit__(None, None, None)
+            except Exception:
+                pass
+            self.connection = None
+
+def email_worker():
+    """Deliver queued admin emails, reusing one SMTP session per worker"""
+    session = SMTPSession()
+    unrecorded = []  # sent jobs whose 'sent' status could not be stored yet
+    with app.app_context():
+        while not outbox_shutdown.is_set():
+            unrecorded[:] = [job for job in unrecorded if not record_outbox_sent(job)]
+            if unrecorded:
+                # MongoDB is still failing; claiming more jobs would fail too
+                outbox_wakeup.wait(EMAIL_POLL_SECONDS)
+                outbox_wakeup.clear()
+                continue
+            try:
+                job = claim_outbox_job()
+            except Exception:
+                logger.exception("Outbox claim failed")
+                job = None
+
+            if job is None:
+                if session.connection is not None and time.monotonic() - session.last_used > SMTP_IDLE_TIMEOUT_SECONDS:
+                    session.close()
+                outbox_wakeup.wait(EMAIL_POLL_SECONDS)
+                outbox_wakeup.clear()
+                continue
+
+            try:
+                session.send(build_admin_email(**job['payload']))
+            except Exception as e:
+                logger.warning(
+                    "Outbox email failed: %s", e,
+                    extra={'jobId': str(job['_id']), 'attempt': job['attempts']}
+                )
+                explain_email_error(e)
+                try:
+                    record_outbox_result(job, error=e)
+                except Exception:
+                    logger.exception("Failed to record outbox result")
+                continue
+
+            # The email is out; a bookkeeping failure must not turn into a retry
+            logger.info("Outbox email sent to admin", extra={'jobId': str(job['_id'])})
+            if not record_outbox_sent(job):
+                unrecorded.append(job)
+        session.close()
+
+def start_email_workers():
+    """Start the outbox worker pool, or warn about undeliverable jobs if email is not configured"""
+    if email_worker_threads:
+        return
+    if not email_config_valid:
+        try:
+            backlog = outbox_backlog()
+        except Exception as e:
+            logger.warning("Email is not configured and the outbox could not be checked: %s", e)
+            return
+        if backlog['pending']:
+            logger.warning(
+                "Email is not configured: %d admin notifications are queued and will not be sent",
+                backlog['pending'], extra={'oldestPendingSeconds': backlog['oldestPendingSeconds']}
+            )
+        return
+    for i in range(EMAIL_WORKERS):
+        worker = threading.Thread(target=email_worker, name=f'email-worker-{i}', daemon=True)
+        worker.start()
+        email_worker_threads.append(worker)
+    logger.info("Started %d email outbox workers", EMAIL_WORKERS)
 
-# Initialize database indexes
-create_report_index()
+def stop_email_workers():
+    """Signal outbox workers to finish their current job and close SMTP sessions"""
+    outbox_shutdown.set()
+    outbox_wakeup.set()
+    for worker in email_worker_threads:
+        worker.join(timeout=10)
+
+# lastLogin is written behind: logins record the time here and a background
+# thread writes everything pending in one bulk_write
+LAST_LOGIN_FLUSH_SECONDS = float(os.environ.get('LAST_LOGIN_FLUSH_SECONDS', '5'))
+
+class LastLoginBuffer:
+    """Pending lastLogin times by user id, flushed periodically with bulk_write"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def record(self, user_id, when):
+        with self.lock:
+            self.pending[user_id] = when
+
+    def flush(self):
+        """Write all pending lastLogin values; returns how many were written"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+        
+        # $max keeps the newest time if another process flushes out of order
+        updates = [UpdateOne({'_id': user_id}, {'$max': {'lastLogin': when}}) for user_id, when in pending.items()]
+        try:
+            users_collection.bulk_write(updates, ordered=False)
+        except Exception as e:
+            logger.warning("lastLogin flush failed, will retry: %s", e)
+            with self.lock:
+                for user_id, when in pending.items():
+                    self.pending.setdefault(user_id, when)
+            return 0
+        
+        # No users version bump: a flush every few seconds would keep
+        # invalidating the /api/stats and /api/users ETags over lastLogin alone
+        return len(pending)
+
+    def run(self):
+        while not self.stopped.wait(LAST_LOGIN_FLUSH_SECONDS):
+            self.flush()
+        self.flush()
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name='last-login-writer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the writer thread after a final flush"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=10)
+
+last_login_buffer = LastLoginBuffer()
 
 # Configure Flask to serve static files
 @app.route('/css/<path:filename>')
@@ -206,44 +1030,167 @@ def serve_images(filename):
 def serve_fonts(filename):
     return send_from_directory('fonts', filename)
 
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """Serve a content-hashed build asset, precompressed when the client accepts it"""
+    path = safe_join(ASSET_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        return jsonify({
+            'success': False,
+            'error': 'Asset not found'
+        }), 404
+    
+    encoding = None
+    for name, suffix in PRECOMPRESSED_ENCODINGS:
+        if request.accept_encodings[name] and os.path.isfile(path + suffix):
+            encoding = name
+            path += suffix
+            break
+    
+    response = send_file(
+        path,
+        mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        conditional=True,
+        etag=os.path.basename(path),
+        max_age=ASSET_CACHE_SECONDS
+    )
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+# Pages are static HTML: each is rendered once per process and kept in memory
+# with precompressed copies. In debug mode a page is re-rendered when its file changes
+class PageCache:
+    """Rendered pages by name, with their ETag and gzip/brotli bodies"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pages = {}
+
+    def render(self, name):
+        """Render a page, using its built copy (which loads bundled assets) when there is one"""
+        template = f'dist/{name}' if name in built_pages else name
+        path = os.path.join(app.root_path, template)
+        mtime = os.stat(path).st_mtime
+        with app.app_context():
+            body = render_template(template).encode('utf-8')
+        
+        bodies = precompress(body)
+        bodies['identity'] = body
+        return {
+            'etag': hashlib.sha1(body).hexdigest()[:20],
+            'bodies': bodies,
+            'path': path,
+            'mtime': mtime
+        }
+
+    def get(self, name):
+        page = self.pages.get(name)
+        if page is not None and app.debug:
+            try:
+                if os.stat(page['path']).st_mtime != page['mtime']:
+                    page = None
+            except OSError:
+                pass
+        
+        if page is None:
+            page = self.render(name)
+            with self.lock:
+                self.pages[name] = page
+        return page
+
+    def warm(self):
+        """Render every page up front so no request pays for it"""
+        for name in page_paths():
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.warning("Could not pre-render %s: %s", name, e)
+        logger.info("%d pages pre-rendered", len(self.pages))
+
+page_cache = PageCache()
+
+def render_page(name, status=200):
+    """Serve a cached page in the best encoding the client accepts"""
+    page = page_cache.get(name)
+    encoding = next(
+        (coding for coding in ('br', 'gzip') if coding in page['bodies'] and request.accept_encodings[coding]),
+        'identity'
+    )
+    # Each encoding is a different representation, so it gets its own ETag
+    etag = page['etag'] if encoding == 'identity' else f"{page['etag']}-{encoding}"
+    
+    if status == 200 and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(page['bodies'][encoding], status=status, mimetype='text/html')
+        if encoding != 'identity':
+            response.content_encoding = encoding
+    
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = True
+    return response
+
 # Main routes
 @app.route('/')
+@app.route('/index.html')
 def index():
-    return render_template('index.html')
+    return render_page('index.html')
 
 @app.route('/home.html')
 def home():
-    return render_template('home.html')
+    return render_page('home.html')
 
 @app.route('/new-post.html')
 def new_post():
-    return render_template('new-post.html')
+    return render_page('new-post.html')
 
 # Auth routes
 @app.route('/pages/auth/login.html')
 def login():
-    return render_template('pages/auth/login.html')
+    return render_page('pages/auth/login.html')
 
 @app.route('/pages/auth/register.html')
 def register():
-    return render_template('pages/auth/register.html')
+    return render_page('pages/auth/register.html')
+
+@app.route('/pages/auth/register-admin.html')
+def register_admin():
+    return render_page('pages/auth/register-admin.html')
+
+@app.route('/pages/auth/register-citizen.html')
+def register_citizen():
+    return render_page('pages/auth/register-citizen.html')
+
+@app.route('/pages/auth/register-official.html')
+def register_official():
+    return render_page('pages/auth/register-official.html')
 
 # Info routes
 @app.route('/pages/info/about.html')
 def about():
-    return render_template('pages/info/about.html')
+    return render_page('pages/info/about.html')
 
 @app.route('/pages/info/contact.html')
 def contact():
-    return render_template('pages/info/contact.html')
+    return render_page('pages/info/contact.html')
 
-# Reports route
+# Reports routes
 @app.route('/pages/reports.html')
 def reports():
-    return render_template('pages/reports.html')
+    return render_page('pages/reports.html')
+
+@app.route('/pages/live-disasters.html')
+def live_disasters():
+    return render_page('pages/live-disasters.html')
 
 # API endpoints for disaster reports
 @app.route('/api/reports', methods=['GET'])
+@conditional_get('reports')
 def get_reports():
     """Get all disaster reports from MongoDB"""
     try:
@@ -260,71 +1207,147 @@ def get_reports():
         if type_filter != 'all':
             query['disasterType'] = type_filter
         
-        # Get pagination parameters
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 50))
-        skip = (page - 1) * limit
-        
-        # Query reports from MongoDB
-        reports_cursor = reports_collection.find(query).sort('timestamp', -1).skip(skip).limit(limit)
-        reports = [serialize_mongo_doc(report) for report in reports_cursor]
-        
-        # Get total count for pagination
-        total_count = reports_collection.count_documents(query)
+        # Project only the fields the client needs (?view=map|list|full or ?fields=)
+        fields, error = requested_report_fields('list')
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
         
-        return jsonify({
-            'success': True,
-            'reports': reports,
-            'total': total_count,
-            'page': page,
-            'limit': limit,
-            'pages': (total_count + limit - 1) // limit
-        })
+        return paginated_response(reports_collection, query, 'timestamp', 'reports', 50,
+                                  projection=fields_projection(fields))
         
-    except Exception as e:
-        print(f"❌ Error fetching reports: {e}")
+    except Exception:
+        logger.exception("Error fetching reports")
         return jsonify({
             'success': False,
             'error': 'Failed to fetch reports'
         }), 500
 
+REQUIRED_REPORT_FIELDS = ['disasterType', 'description', 'location', 'name']
+
+# Bulk ingestion: NDJSON lines are inserted in unordered batches of this size
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', '500'))
+BULK_MAX_LINE_BYTES = int(os.environ.get('BULK_MAX_LINE_BYTES', str(16 * 1024 * 1024)))
+
+# Bulk writes push at most this many live map events; above it clients get one
+# 'reset' and reload (must stay below SSE_CLIENT_QUEUE_SIZE)
+BULK_PUBLISH_LIMIT = 200
+
+def discard_unused_photos(photo_hashes):
+    """Delete photos written for reports that were not saved, unless a saved report uses them"""
+    for photo_hash in set(photo_hashes):
+        try:
+            if reports_collection.find_one({'photos.hash': photo_hash}, {'_id': 1}) is None:
+                photo_store.delete(photo_hash)
+        except Exception as e:
+            logger.warning("Could not remove unused photo %s: %s", photo_hash, e)
+
+def report_photo_hashes(reports):
+    return [photo['hash'] for report in reports for photo in report.get('photos', [])]
+
+def build_report(data):
+    """Validate submitted report data and build the document to insert.
+
+    Returns (report, error message). Photos are moved to the photo store,
+    coordinates resolved and severity classified here, once, at ingest. If
+    the report is then not inserted, pass it to discard_unused_photos.
+    """
+    if not isinstance(data, dict):
+        return None, 'Report must be a JSON object'
+    
+    # Validate required fields
+    for field in REQUIRED_REPORT_FIELDS:
+        if not isinstance(data.get(field), str) or not data[field].strip():
+            return None, f'Missing required field: {field}'
+    
+    # Move photo data out of the report document
+    created = []
+    try:
+        photos = photo_store.store_photos(data.get('photos', []), created)
+    except PhotoError as e:
+        discard_unused_photos(created)
+        return None, str(e)
+    except BaseException:
+        discard_unused_photos(created)
+        raise
+    
+    try:
+        return build_report_document(data, photos), None
+    except BaseException:
+        discard_unused_photos(created)
+        raise
+
+def build_report_document(data, photos):
+    """The report document for validated data and its stored photo references"""
+    # Geocode once at ingest so map reads never have to
+    coordinates, geocode_source = resolve_report_coordinates(data, data['location'])
+    
+    # Create new report document
+    report = {
+        'name': data['name'].strip(),
+        'location': data['location'].strip(),
+        'disasterType': data['disasterType'],
+        'description': data['description'].strip(),
+        'coordinates': coordinates,
+        'geocodeSource': geocode_source,
+        'address': data.get('address', ''),
+        'photos': photos,
+        'timestamp': mongo_now(),
+        'status': 'pending',
+        'verified': False,
+        'severity': data.get('severity', 'medium'),
+        'contactInfo': data.get('contactInfo', ''),
+        'reporterIP': request.remote_addr,
+        'userAgent': request.headers.get('User-Agent', '')
+    }
+    
+    # Classify once at ingest; 'severity' stays what the reporter chose
+    classifier = severity_rules.current()
+    report['computedSeverity'] = classifier.classify(report['disasterType'], report['description'])
+    report['severityRulesVersion'] = classifier.version
+    
+    # GeoJSON copy of the coordinates for viewport/radius queries
+    if coordinates:
+        report['geo'] = geojson_point(coordinates)
+    
+    return report
+
+def report_increments(reports):
+    """Dashboard counter and heatmap tile increments for newly inserted reports"""
+    increments = Counter()
+    n = 2 ** TILE_VERSION_ZOOM
+    for report in reports:
+        increments['reports.total'] += 1
+        increments[f"reports.status.{report['status']}"] += 1
+        increments[f"reports.type.{counter_key(report['disasterType'])}"] += 1
+        if report['coordinates']:
+            lat, lng = report['coordinates']
+            increments[f'tiles.{lng_to_tile_x(lng, n)}_{lat_to_tile_y(lat, n)}'] += 1
+    return dict(increments)
+
 @app.route('/api/reports', methods=['POST'])
 def submit_report():
     """Submit a new disaster report to MongoDB"""
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['disasterType', 'description', 'location', 'name']
-        for field in required_fields:
-            if field not in data or not data[field].strip():
-                return jsonify({
-                    'success': False,
-                    'error': f'Missing required field: {field}'
-                }), 400
-        
-        # Create new report document
-        report = {
-            'name': data['name'].strip(),
-            'location': data['location'].strip(),
-            'disasterType': data['disasterType'],
-            'description': data['description'].strip(),
-            'coordinates': data.get('coordinates', {}),
-            'address': data.get('address', ''),
-            'photos': data.get('photos', []),
-            'timestamp': datetime.utcnow(),
-            'status': 'pending',
-            'verified': False,
-            'severity': data.get('severity', 'medium'),
-            'contactInfo': data.get('contactInfo', ''),
-            'reporterIP': request.remote_addr,
-            'userAgent': request.headers.get('User-Agent', '')
-        }
+        report, error = build_report(request.get_json())
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
         
         # Insert into MongoDB
-        result = reports_collection.insert_one(report)
+        try:
+            result = reports_collection.insert_one(report)
+        except Exception:
+            discard_unused_photos(report_photo_hashes([report]))
+            raise
         
         if result.inserted_id:
+            bump_stats(report_increments([report]), touched=('reports',))
+            publish_live_disaster(report)
             return jsonify({
                 'success': True,
                 'message': 'Report submitted successfully',
@@ -336,14 +1359,140 @@ def submit_report():
                 'error': 'Failed to save report'
             }), 500
         
-    except Exception as e:
-        print(f"❌ Error submitting report: {e}")
+    except Exception:
+        logger.exception("Error submitting report")
         return jsonify({
             'success': False,
             'error': 'Failed to submit report'
         }), 500
 
+def read_ndjson_lines(stream):
+    """Yield (line number, raw line) from a request body without reading it all.
+
+    Lines longer than BULK_MAX_LINE_BYTES are skipped and yielded as None.
+    """
+    line_number = 0
+    while True:
+        line = stream.readline(BULK_MAX_LINE_BYTES + 1)
+        if not line:
+            return
+        line_number += 1
+        if len(line) > BULK_MAX_LINE_BYTES:
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(64 * 1024)
+            yield line_number, None
+        else:
+            yield line_number, line
+
+def insert_report_batch(batch):
+    """insert_many one batch of (line number, report) unordered.
+
+    Returns the per-line results and the inserted reports.
+    """
+    failed = {}
+    try:
+        reports_collection.insert_many([report for _, report in batch], ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get('writeErrors', []):
+            failed[write_error['index']] = write_error.get('errmsg', 'Failed to save report')
+    except Exception:
+        logger.exception("Error inserting report batch")
+        failed = {index: 'Failed to save report' for index in range(len(batch))}
+    
+    inserted = [report for index, (_, report) in enumerate(batch) if index not in failed]
+    if failed:
+        discard_unused_photos(report_photo_hashes(
+            report for index, (_, report) in enumerate(batch) if index in failed
+        ))
+    if inserted:
+        bump_stats(report_increments(inserted), touched=('reports',))
+    
+    results = [
+        {'line': line_number, 'success': False, 'error': failed[index]} if index in failed
+        else {'line': line_number, 'success': True, 'reportId': str(report['_id'])}
+        for index, (line_number, report) in enumerate(batch)
+    ]
+    return results, inserted
+
+@app.route('/api/reports/bulk', methods=['POST'])
+def submit_reports_bulk():
+    """Submit many reports as NDJSON (one report per line); streams per-line results as NDJSON"""
+    def generate():
+        batch = []
+        summary = Counter(received=0, inserted=0, failed=0)
+        # Live map events go out when the upload ends, so a large one becomes a single reset
+        to_publish = []
+        
+        def emit(results, inserted=()):
+            to_publish.extend(inserted[:BULK_PUBLISH_LIMIT + 1 - len(to_publish)])
+            for result in results:
+                summary['inserted' if result['success'] else 'failed'] += 1
+                yield json.dumps(result) + '\n'
+        
+        try:
+            for line_number, line in read_ndjson_lines(request.stream):
+                if line is not None and not line.strip():
+                    continue
+                summary['received'] += 1
+                
+                if line is None:
+                    error = f'Line exceeds {BULK_MAX_LINE_BYTES} bytes'
+                else:
+                    try:
+                        report, error = build_report(json.loads(line))
+                    except ValueError:
+                        error = 'Invalid JSON'
+                if error:
+                    yield from emit([{'line': line_number, 'success': False, 'error': error}])
+                    continue
+                
+                batch.append((line_number, report))
+                if len(batch) >= BULK_BATCH_SIZE:
+                    yield from emit(*insert_report_batch(batch))
+                    batch = []
+            
+            if batch:
+                yield from emit(*insert_report_batch(batch))
+                batch = []
+        finally:
+            # An upload cut off mid-batch leaves photos for reports never inserted
+            if batch:
+                discard_unused_photos(report_photo_hashes(report for _, report in batch))
+            publish_live_disasters(to_publish)
+        
+        logger.info("Bulk ingest finished", extra={'inserted': summary['inserted'], 'failed': summary['failed']})
+        yield json.dumps({'summary': dict(summary)}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/photos/<photo_hash>', methods=['GET'])
+def get_photo(photo_hash):
+    """Stream a stored report photo (supports Range requests; content never changes)"""
+    if not PHOTO_HASH_PATTERN.fullmatch(photo_hash):
+        return jsonify({
+            'success': False,
+            'error': 'Invalid photo ID'
+        }), 400
+    
+    if not photo_store.exists(photo_hash):
+        return jsonify({
+            'success': False,
+            'error': 'Photo not found'
+        }), 404
+    
+    response = send_file(
+        photo_store.path_for(photo_hash),
+        mimetype=photo_store.content_type(photo_hash),
+        conditional=True,
+        etag=photo_hash,
+        max_age=PHOTO_CACHE_SECONDS
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
 @app.route('/api/reports/<report_id>', methods=['GET'])
+@conditional_get('reports')
 def get_report(report_id):
     """Get a specific report by ID"""
     try:
@@ -353,7 +1502,14 @@ def get_report(report_id):
                 'error': 'Invalid report ID'
             }), 400
         
-        report = reports_collection.find_one({'_id': ObjectId(report_id)})
+        fields, error = requested_report_fields('full')
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
+        
+        report = reports_collection.find_one({'_id': ObjectId(report_id)}, fields_projection(fields))
         
         if report:
             return jsonify({
@@ -366,14 +1522,86 @@ def get_report(report_id):
                 'error': 'Report not found'
             }), 404
             
-    except Exception as e:
-        print(f"❌ Error fetching report: {e}")
+    except Exception:
+        logger.exception("Error fetching report")
         return jsonify({
             'success': False,
             'error': 'Failed to fetch report'
         }), 500
 
+REPORT_STATUSES = ['pending', 'verified', 'resolved', 'dismissed']
+
+# Types offered by the report form; its "other" choice stores the reporter's own text
+DISASTER_TYPES = ('flood', 'earthquake', 'fire', 'landslide', 'cyclone')
+
+# Bulk moderation limits
+BULK_STATUS_MAX_IDS = 10000
+
+def status_changes(new_status):
+    """Fields set when a report moves to new_status"""
+    return {
+        'status': new_status,
+        'lastUpdated': mongo_now(),
+        'verified': new_status in ['verified', 'resolved']
+    }
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp into naive UTC, or None"""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def bulk_report_query(data):
+    """Query selecting reports for a bulk action.
+
+    Accepts {'ids': [...]} or {'filter': {status, type, bbox | near + radius,
+    since, until}}. Returns (query, error message).
+    """
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not ids or len(ids) > BULK_STATUS_MAX_IDS:
+            return None, f'ids must be a list of 1 to {BULK_STATUS_MAX_IDS} report IDs'
+        if not all(isinstance(report_id, str) and ObjectId.is_valid(report_id) for report_id in ids):
+            return None, 'Invalid report ID'
+        return {'_id': {'$in': [ObjectId(report_id) for report_id in ids]}}, None
+    
+    criteria = data.get('filter')
+    if not isinstance(criteria, dict):
+        return None, 'Provide ids or a filter'
+    unknown = sorted(set(criteria) - {'status', 'type', 'bbox', 'near', 'radius', 'since', 'until'})
+    if unknown:
+        return None, f"Unknown filter fields: {', '.join(unknown)}"
+    
+    query = {}
+    if 'status' in criteria:
+        query['status'] = criteria['status']
+    if 'type' in criteria:
+        query['disasterType'] = criteria['type']
+    
+    geo_filter, error = area_filter(criteria)
+    if error:
+        return None, error
+    if geo_filter:
+        query.update(geo_filter)
+    
+    for field, operator in (('since', '$gte'), ('until', '$lt')):
+        if field in criteria:
+            timestamp = parse_timestamp(criteria[field])
+            if timestamp is None:
+                return None, f'{field} must be an ISO 8601 timestamp'
+            query.setdefault('timestamp', {})[operator] = timestamp
+    
+    # Never let an empty filter select every report
+    if not query:
+        return None, 'Filter must include at least one of status, type, bbox, near, since or until'
+    return query, None
+
 @app.route('/api/reports/<report_id>/status', methods=['PATCH'])
+@require_auth('admin')
 def update_report_status(report_id):
     """Update report status (for admin use)"""
     try:
@@ -386,24 +1614,32 @@ def update_report_status(report_id):
         data = request.get_json()
         new_status = data.get('status')
         
-        if new_status not in ['pending', 'verified', 'resolved', 'dismissed']:
+        if new_status not in REPORT_STATUSES:
             return jsonify({
                 'success': False,
                 'error': 'Invalid status'
             }), 400
         
-        result = reports_collection.update_one(
+        # Return the previous document (map fields) so the dashboard counters
+        # can move the old status and the live feed can push the change
+        changes = status_changes(new_status)
+        previous = reports_collection.find_one_and_update(
             {'_id': ObjectId(report_id)},
-            {
-                '$set': {
-                    'status': new_status,
-                    'lastUpdated': datetime.utcnow(),
-                    'verified': new_status in ['verified', 'resolved']
-                }
-            }
+            {'$set': changes},
+            projection=fields_projection(live_disaster_query_fields(REPORT_VIEWS['map'])),
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.modified_count > 0:
+        if previous:
+            old_status = previous.get('status')
+            status_counts = {}
+            if old_status != new_status:
+                status_counts = {
+                    f"reports.status.{counter_key(old_status)}": -1,
+                    f"reports.status.{new_status}": 1
+                }
+            bump_stats(status_counts, touched=('reports',))
+            publish_live_disaster({**previous, **changes})
             return jsonify({
                 'success': True,
                 'message': f'Report status updated to {new_status}'
@@ -414,13 +1650,100 @@ def update_report_status(report_id):
                 'error': 'Report not found or status unchanged'
             }), 404
             
-    except Exception as e:
-        print(f"❌ Error updating report status: {e}")
+    except Exception:
+        logger.exception("Error updating report status")
         return jsonify({
             'success': False,
             'error': 'Failed to update report status'
         }), 500
 
+@app.route('/api/reports/status', methods=['PATCH'])
+@require_auth('admin')
+def update_report_status_bulk():
+    """Move many reports (by ids or filter) to a new status with one update_many (for admin use)"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a JSON object'
+            }), 400
+        
+        new_status = data.get('status')
+        if new_status not in REPORT_STATUSES:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid status'
+            }), 400
+        
+        selection, error = bulk_report_query(data)
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
+        
+        # Reports already in the target status are left untouched. The
+        # counters move by the per-status counts read just before the update
+        # (a concurrent moderator can make them drift; counters.py fixes that)
+        moving = {
+            row['_id']: row['count']
+            for row in reports_collection.aggregate([
+                {'$match': selection},
+                {'$group': {'_id': '$status', 'count': {'$sum': 1}}}
+            ])
+        }
+        already_in_status = moving.pop(new_status, 0)
+        matched = already_in_status + sum(moving.values())
+        
+        query = {'$and': [selection, {'status': {'$ne': new_status}}]}
+        changes = status_changes(new_status)
+        result = reports_collection.update_many(query, {'$set': changes})
+        
+        if result.modified_count:
+            status_counts = {f"reports.status.{counter_key(status)}": -count for status, count in moving.items()}
+            status_counts[f"reports.status.{new_status}"] = sum(moving.values())
+            bump_stats(status_counts, touched=('reports',))
+            if result.modified_count != sum(moving.values()):
+                logger.warning(
+                    "Bulk status update moved %d reports, counted %d",
+                    result.modified_count, sum(moving.values())
+                )
+            
+            # Push the changes to the live map, or tell clients to reload if there are too many
+            live = list(reports_collection.find(
+                {
+                    'status': new_status,
+                    'lastUpdated': changes['lastUpdated'],
+                    'timestamp': {'$gte': datetime.utcnow() - LIVE_DISASTER_WINDOW}
+                },
+                fields_projection(live_disaster_query_fields(REPORT_VIEWS['map']))
+            ).limit(BULK_PUBLISH_LIMIT + 1))
+            publish_live_disasters(live)
+        
+        response = {
+            'success': True,
+            'message': f'{result.modified_count} reports updated to {new_status}',
+            'matched': matched,
+            'modified': result.modified_count,
+            'alreadyInStatus': already_in_status
+        }
+        if 'ids' in data:
+            response['notFound'] = max(len(set(data['ids'])) - matched, 0)
+        
+        logger.info(
+            "Bulk status update to %s", new_status,
+            extra={'matched': matched, 'modified': result.modified_count, 'alreadyInStatus': already_in_status}
+        )
+        return jsonify(response)
+        
+    except Exception:
+        logger.exception("Error updating report statuses")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to update report statuses'
+        }), 500
+
 @app.route('/api/auth/login', methods=['POST'])
 def api_login():
     """Handle login requests with MongoDB user verification"""
@@ -440,15 +1763,24 @@ def api_login():
         user = users_collection.find_one({'email': email})
         
         if user and check_password(password, user['password']):
-            # Update last login
-            users_collection.update_one(
-                {'_id': user['_id']},
-                {'$set': {'lastLogin': datetime.utcnow()}}
-            )
+            # Last login is written behind in batches
+            last_login_buffer.record(user['_id'], datetime.utcnow())
+            
+            # Upgrade the hash if BCRYPT_ROUNDS changed
+            if needs_rehash(user['password']):
+                try:
+                    users_collection.update_one(
+                        {'_id': user['_id']},
+                        {'$set': {'password': hash_password(password)}}
+                    )
+                except PasswordPoolBusy:
+                    pass  # upgrade on a later login
             
             return jsonify({
                 'success': True,
                 'message': 'Login successful',
+                'token': token_signer.issue(user),
+                'expiresIn': AUTH_TOKEN_SECONDS,
                 'user': {
                     'id': str(user['_id']),
                     'email': user['email'],
@@ -463,11 +1795,32 @@ def api_login():
                 'error': 'Invalid email or password'
             }), 401
             
-    except Exception as e:
-        print(f"❌ Login error: {e}")
+    except PasswordPoolBusy:
+        return password_busy_response()
+    except Exception:
+        logger.exception("Login error")
+        return jsonify({
+            'success': False,
+            'error': 'Login failed'
+        }), 500
+
+@app.route('/api/auth/logout', methods=['POST'])
+@require_auth()
+def api_logout():
+    """Revoke the request's token before it expires"""
+    try:
+        revocations.revoke(g.auth['jti'], g.auth['exp'])
+        bump_stats({}, touched=('revoked_tokens',))
+        return jsonify({
+            'success': True,
+            'message': 'Logged out'
+        })
+        
+    except Exception:
+        logger.exception("Logout error")
         return jsonify({
             'success': False,
-            'error': 'Login failed'
+            'error': 'Logout failed'
         }), 500
 
 @app.route('/api/auth/register', methods=['POST'])
@@ -491,6 +1844,12 @@ def api_register():
         phone = data.get('phone', '').strip()
         user_type = data.get('userType', 'citizen')
         
+        if user_type not in USER_TYPES:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid user type'
+            }), 400
+        
         # Validate email format
         if '@' not in email or len(email.split('@')) != 2:
             return jsonify({
@@ -505,39 +1864,49 @@ def api_register():
                 'error': 'Password must be at least 6 characters long'
             }), 400
         
-        # Check if user already exists
-        existing_user = users_collection.find_one({'email': email})
-        if existing_user:
-            return jsonify({
-                'success': False,
-                'error': 'User with this email already exists'
-            }), 409
-        
         # Create new user document
         user = {
             'fullName': full_name,
             'email': email,
             'password': hash_password(password),
             'phone': phone,
-            'userType': user_type,
+            'userType': 'citizen',
             'verified': False,
             'createdAt': datetime.utcnow(),
             'lastLogin': None,
             'active': True
         }
         
-        # Insert user into MongoDB
-        result = users_collection.insert_one(user)
+        # Privileged roles are only requested here; verify_user grants them
+        if user_type in PRIVILEGED_USER_TYPES:
+            user['roleRequest'] = {
+                'role': user_type,
+                'requestedAt': datetime.utcnow(),
+                **{field: str(data.get(field, '')).strip() for field in ROLE_REQUEST_FIELDS}
+            }
+        
+        # Insert user into MongoDB; the unique email index rejects duplicates
+        try:
+            result = users_collection.insert_one(user)
+        except DuplicateKeyError:
+            return jsonify({
+                'success': False,
+                'error': 'User with this email already exists'
+            }), 409
         
         if result.inserted_id:
+            bump_stats({'users.total': 1}, touched=('users',))
+            requested_role = user.get('roleRequest', {}).get('role')
             return jsonify({
                 'success': True,
-                'message': 'Registration successful',
+                'message': (f'Registration successful. Your {requested_role} access request is pending admin approval'
+                            if requested_role else 'Registration successful'),
                 'user': {
                     'id': str(result.inserted_id),
                     'name': full_name,
                     'email': email,
-                    'type': user_type
+                    'type': user['userType'],
+                    'requestedRole': requested_role
                 }
             })
         else:
@@ -546,16 +1915,19 @@ def api_register():
                 'error': 'Failed to create user account'
             }), 500
         
-    except Exception as e:
-        print(f"❌ Registration error: {e}")
+    except PasswordPoolBusy:
+        return password_busy_response()
+    except Exception:
+        logger.exception("Registration error")
         return jsonify({
             'success': False,
             'error': 'Registration failed'
         }), 500
 
 @app.route('/api/auth/verify/<user_id>', methods=['POST'])
+@require_auth('admin')
 def verify_user(user_id):
-    """Verify user account (admin function)"""
+    """Verify user account and grant any requested role (admin function)"""
     try:
         if not ObjectId.is_valid(user_id):
             return jsonify({
@@ -563,20 +1935,31 @@ def verify_user(user_id):
                 'error': 'Invalid user ID'
             }), 400
         
-        result = users_collection.update_one(
-            {'_id': ObjectId(user_id)},
-            {
-                '$set': {
-                    'verified': True,
-                    'verifiedAt': datetime.utcnow()
-                }
+        user = users_collection.find_one({'_id': ObjectId(user_id)}, {'roleRequest': 1})
+        update = {
+            '$set': {
+                'verified': True,
+                'verifiedAt': datetime.utcnow()
             }
-        )
+        }
+        requested_role = (user or {}).get('roleRequest', {}).get('role')
+        if requested_role in PRIVILEGED_USER_TYPES:
+            update['$set']['userType'] = requested_role
+            update['$unset'] = {'roleRequest': ''}
+        
+        # Return the previous verified flag so the counter only moves once
+        previous = users_collection.find_one_and_update(
+            {'_id': ObjectId(user_id)},
+            update,
+            projection={'verified': 1},
+            return_document=ReturnDocument.BEFORE
+        ) if user else None
         
-        if result.modified_count > 0:
+        if previous:
+            bump_stats({'users.verified': 0 if previous.get('verified') else 1}, touched=('users',))
             return jsonify({
                 'success': True,
-                'message': 'User verified successfully'
+                'message': f'User verified as {requested_role}' if requested_role else 'User verified successfully'
             })
         else:
             return jsonify({
@@ -584,8 +1967,8 @@ def verify_user(user_id):
                 'error': 'User not found'
             }), 404
             
-    except Exception as e:
-        print(f"❌ User verification error: {e}")
+    except Exception:
+        logger.exception("User verification error")
         return jsonify({
             'success': False,
             'error': 'Failed to verify user'
@@ -616,7 +1999,8 @@ def api_contact():
             'status': 'new',
             'replied': False,
             'adminEmail': ADMIN_EMAIL,  # Include admin email for reference
-            'sentToAdmin': True,  # Mark as sent to admin
+            'sentToAdmin': True,  # Admin notification is queued in the outbox
+            'emailSent': False,  # Set by the outbox worker once delivered
             'ipAddress': request.remote_addr,
             'userAgent': request.headers.get('User-Agent', '')
         }
@@ -632,33 +2016,20 @@ def api_contact():
         result = contacts_collection.insert_one(contact)
         
         if result.inserted_id:
-            # Send email to admin
-            email_sent = send_email_to_admin(
-                subject=contact['subject'],
-                sender_name=contact['name'],
-                sender_email=contact['email'],
-                message_body=contact['message'],
-                contact_subject=contact['subject']
-            )
+            bump_stats({'contacts.total': 1, f"contacts.status.{contact['status']}": 1}, touched=('contacts',))
             
-            # Update contact record with email status
-            contacts_collection.update_one(
-                {'_id': result.inserted_id},
-                {'$set': {'emailSent': email_sent, 'emailSentAt': datetime.utcnow() if email_sent else None}}
-            )
+            # Queue the admin notification; outbox workers deliver it
+            enqueue_admin_email(result.inserted_id, contact)
             
-            success_message = f'Thank you for your message! It has been sent to our admin team at {ADMIN_EMAIL}.'
-            if email_sent:
-                success_message += ' You should receive a response within 24-48 hours.'
-            else:
-                success_message += ' Your message has been saved and our admin will be notified.'
+            success_message = ('Thank you for your message! We have received it and our admin team will be notified.'
+                               ' You should receive a response within 24-48 hours.')
             
             return jsonify({
                 'success': True,
                 'message': success_message,
                 'contactId': str(result.inserted_id),
                 'adminEmail': ADMIN_EMAIL,
-                'emailDelivered': email_sent
+                'emailQueued': True
             })
         else:
             return jsonify({
@@ -666,44 +2037,27 @@ def api_contact():
                 'error': 'Failed to save contact message'
             }), 500
         
-    except Exception as e:
-        print(f"❌ Contact form error: {e}")
+    except Exception:
+        logger.exception("Contact form error")
         return jsonify({
             'success': False,
             'error': 'Failed to send message'
         }), 500
 
 @app.route('/api/contact', methods=['GET'])
+@require_auth('admin')
+@conditional_get('contacts')
 def get_contacts():
     """Get all contact messages (admin function)"""
     try:
-        # Get pagination parameters
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 20))
-        skip = (page - 1) * limit
-        
         # Filter by status if provided
         status_filter = request.args.get('status', 'all')
         query = {} if status_filter == 'all' else {'status': status_filter}
         
-        # Query contacts from MongoDB
-        contacts_cursor = contacts_collection.find(query).sort('timestamp', -1).skip(skip).limit(limit)
-        contacts = [serialize_mongo_doc(contact) for contact in contacts_cursor]
-        
-        # Get total count
-        total_count = contacts_collection.count_documents(query)
-        
-        return jsonify({
-            'success': True,
-            'contacts': contacts,
-            'total': total_count,
-            'page': page,
-            'limit': limit,
-            'pages': (total_count + limit - 1) // limit
-        })
+        return paginated_response(contacts_collection, query, 'timestamp', 'contacts', 20)
         
-    except Exception as e:
-        print(f"❌ Error fetching contacts: {e}")
+    except Exception:
+        logger.exception("Error fetching contacts")
         return jsonify({
             'success': False,
             'error': 'Failed to fetch contact messages'
@@ -721,293 +2075,942 @@ def get_admin_email():
 
 # Additional API endpoints
 @app.route('/api/stats', methods=['GET'])
+@conditional_get('reports', 'users', 'contacts', 'stats')
 def get_stats():
     """Get dashboard statistics"""
     try:
-        # Get report statistics
-        total_reports = reports_collection.count_documents({})
-        pending_reports = reports_collection.count_documents({'status': 'pending'})
-        verified_reports = reports_collection.count_documents({'status': 'verified'})
-        resolved_reports = reports_collection.count_documents({'status': 'resolved'})
-        
-        # Get user statistics
-        total_users = users_collection.count_documents({})
-        verified_users = users_collection.count_documents({'verified': True})
-        
-        # Get contact statistics
-        total_contacts = contacts_collection.count_documents({})
-        new_contacts = contacts_collection.count_documents({'status': 'new'})
+        # One point read of the counters maintained by the write endpoints
+        counters = stats_collection.find_one({'_id': STATS_ID}) or {}
+        report_counts = counters.get('reports', {})
+        report_status = report_counts.get('status', {})
+        user_counts = counters.get('users', {})
+        contact_counts = counters.get('contacts', {})
         
         # Get disaster type distribution
-        disaster_types = list(reports_collection.aggregate([
-            {'$group': {'_id': '$disasterType', 'count': {'$sum': 1}}},
-            {'$sort': {'count': -1}}
-        ]))
+        disaster_types = sorted(
+            ({'_id': disaster_type, 'count': count}
+             for disaster_type, count in report_counts.get('type', {}).items() if count > 0),
+            key=lambda row: row['count'],
+            reverse=True
+        )
         
         return jsonify({
             'success': True,
             'stats': {
                 'reports': {
-                    'total': total_reports,
-                    'pending': pending_reports,
-                    'verified': verified_reports,
-                    'resolved': resolved_reports
+                    'total': report_counts.get('total', 0),
+                    'pending': report_status.get('pending', 0),
+                    'verified': report_status.get('verified', 0),
+                    'resolved': report_status.get('resolved', 0)
                 },
                 'users': {
-                    'total': total_users,
-                    'verified': verified_users
+                    'total': user_counts.get('total', 0),
+                    'verified': user_counts.get('verified', 0)
                 },
                 'contacts': {
-                    'total': total_contacts,
-                    'new': new_contacts
+                    'total': contact_counts.get('total', 0),
+                    'new': contact_counts.get('status', {}).get('new', 0)
                 },
                 'disaster_types': disaster_types
             }
         })
         
-    except Exception as e:
-        print(f"❌ Error fetching stats: {e}")
+    except Exception:
+        logger.exception("Error fetching stats")
         return jsonify({
             'success': False,
             'error': 'Failed to fetch statistics'
         }), 500
 
 @app.route('/api/users', methods=['GET'])
+@require_auth('admin')
+@conditional_get('users')
 def get_users():
     """Get all users (admin function)"""
     try:
-        # Get pagination parameters
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 20))
-        skip = (page - 1) * limit
-        
         # Query users from MongoDB (exclude password field)
-        users_cursor = users_collection.find(
-            {}, 
-            {'password': 0}  # Exclude password field
-        ).sort('createdAt', -1).skip(skip).limit(limit)
-        
-        users = [serialize_mongo_doc(user) for user in users_cursor]
+        return paginated_response(users_collection, {}, 'createdAt', 'users', 20,
+                                  projection={'password': 0})
         
-        # Get total count
-        total_count = users_collection.count_documents({})
-        
-        return jsonify({
-            'success': True,
-            'users': users,
-            'total': total_count,
-            'page': page,
-            'limit': limit,
-            'pages': (total_count + limit - 1) // limit
-        })
-        
-    except Exception as e:
-        print(f"❌ Error fetching users: {e}")
+    except Exception:
+        logger.exception("Error fetching users")
         return jsonify({
             'success': False,
             'error': 'Failed to fetch users'
         }), 500
 
 # Live Disasters API endpoint
+LIVE_DISASTER_WINDOW = timedelta(hours=24)
+LIVE_DISASTER_LIMIT = 50
+LIVE_DISASTER_AREA_LIMIT = int(os.environ.get('LIVE_DISASTER_AREA_LIMIT', '2000'))
+LIVE_DISASTER_DEFAULT_RADIUS_KM = 50
+LIVE_DISASTER_MAX_RADIUS_KM = 2000
+EARTH_RADIUS_KM = 6378.1
+
+# Map clustering: each 256px web map tile is split into a grid of cells and
+# reports in a cell are merged into one cluster
+CLUSTER_GRID_CELLS = int(os.environ.get('CLUSTER_GRID_CELLS', '4'))
+CLUSTER_MAX_TILES = 64
+CLUSTER_MAX_ZOOM = 18
+CLUSTER_CACHE_SIZE = int(os.environ.get('CLUSTER_CACHE_SIZE', '2048'))
+MERCATOR_MAX_LAT = 85.0511
+
+def live_disaster_query_fields(fields):
+    """Fields to load so format_live_disaster can fill coordinates/severity for older reports"""
+    query_fields = set(fields)
+    if 'coordinates' in fields:
+        query_fields.update(['location', 'geocodeSource'])
+    if 'severity' in fields:
+        query_fields.update(['computedSeverity', 'disasterType', 'description'])
+    return query_fields
+
+def format_live_disaster(report, fields):
+    """Shape a report document for the live map, keeping only the requested fields"""
+    report['_id'] = str(report['_id'])
+    
+    # Convert timestamp to ISO format string for JavaScript compatibility
+    if 'timestamp' in report and report['timestamp']:
+        report['timestamp'] = report['timestamp'].isoformat() + 'Z'
+    
+    # Coordinates are resolved at ingest; only reports saved before that
+    # (see backfill_reports.py) still need a lookup here. Unknown
+    # locations get coordinates None and geocodeSource 'unknown'.
+    if 'coordinates' in fields:
+        coordinates = normalize_coordinates(report.get('coordinates'))
+        if not coordinates and not report.get('geocodeSource'):
+            coordinates, report['geocodeSource'] = geocode_location(report['location'])
+        report['coordinates'] = coordinates
+    
+    # The map shows the computed severity; the reporter's own rating is
+    # kept alongside it. Severity is computed at ingest, so only reports
+    # saved before that (see backfill_reports.py) are classified here.
+    output_fields = set(fields) | {'_id'}
+    if 'severity' in fields:
+        report['reportedSeverity'] = report.get('severity')
+        report['severity'] = report.get('computedSeverity') or determine_severity(report)
+        output_fields.add('reportedSeverity')
+    
+    return {key: value for key, value in report.items() if key in output_fields}
+
+def bbox_polygon(min_lng, min_lat, max_lng, max_lat):
+    """GeoJSON polygon for a lng/lat box.
+
+    2dsphere edges are great-circle arcs, so the top and bottom edges are
+    split into steps of at most one degree to stay close to the parallels.
+    """
+    steps = max(1, int(max_lng - min_lng + 0.999))
+    bottom = [[min_lng + (max_lng - min_lng) * i / steps, min_lat] for i in range(steps + 1)]
+    top = [[lng, max_lat] for lng, _ in reversed(bottom)]
+    ring = bottom + top + [bottom[0]]
+    return {'type': 'Polygon', 'coordinates': [ring]}
+
+def parse_floats(value, count):
+    """Parse a comma separated string (or a list) of exactly count numbers, or None"""
+    parts = value if isinstance(value, (list, tuple)) else str(value).split(',')
+    try:
+        numbers = [float(part) for part in parts]
+    except (TypeError, ValueError):
+        return None
+    return numbers if len(numbers) == count else None
+
+def area_filter(params=None):
+    """Geo filter from ?bbox=minLng,minLat,maxLng,maxLat or ?near=lat,lng&radius=km.
+
+    params defaults to the query string. Returns (filter or None, error message).
+    """
+    if params is None:
+        params = request.args
+    
+    if 'bbox' in params:
+        bbox = parse_floats(params['bbox'], 4)
+        if not bbox:
+            return None, 'bbox must be minLng,minLat,maxLng,maxLat'
+        min_lng, min_lat, max_lng, max_lat = bbox
+        if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+            return None, 'bbox is out of range'
+        if max_lng - min_lng >= 180:
+            return None, 'bbox must span less than 180 degrees of longitude'
+        return {'geo': {'$geoWithin': {'$geometry': bbox_polygon(*bbox)}}}, None
+    
+    if 'near' in params:
+        near = normalize_coordinates(parse_floats(params['near'], 2))
+        if not near:
+            return None, 'near must be lat,lng'
+        try:
+            radius = float(params.get('radius', LIVE_DISASTER_DEFAULT_RADIUS_KM))
+        except (TypeError, ValueError):
+            return None, 'radius must be a number of kilometres'
+        if not 0 < radius <= LIVE_DISASTER_MAX_RADIUS_KM:
+            return None, f'radius must be between 0 and {LIVE_DISASTER_MAX_RADIUS_KM} km'
+        lat, lng = near
+        return {'geo': {'$geoWithin': {'$centerSphere': [[lng, lat], radius / EARTH_RADIUS_KM]}}}, None
+    
+    return None, None
+
 @app.route('/api/live-disasters', methods=['GET'])
+@conditional_get('reports', time_bucket=60)
 def get_live_disasters():
     """Get live disasters with location data for map visualization"""
     try:
         # Get recent disasters (last 24 hours) that are still active
-        from datetime import datetime, timedelta
+        twenty_four_hours_ago = datetime.utcnow() - LIVE_DISASTER_WINDOW
+        
+        # Public endpoint: map/list views or an explicit field list, never reporter details
+        fields, error = requested_report_fields('map', public=True)
+        if not error:
+            geo_filter, error = area_filter()
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
+        
+        match = {
+            'timestamp': {'$gte': twenty_four_hours_ago},
+            'location': {'$exists': True, '$ne': ''}
+        }
         
-        # Calculate 24 hours ago
-        twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
+        # Nationwide: the newest 50. For a viewport or radius, everything in
+        # the area (served by the geo/timestamp 2dsphere index)
+        limit = LIVE_DISASTER_LIMIT
+        if geo_filter:
+            match.update(geo_filter)
+            limit = LIVE_DISASTER_AREA_LIMIT
         
         # Query for recent, active disasters with location data
         pipeline = [
             {
-                '$match': {
-                    'timestamp': {'$gte': twenty_four_hours_ago},
-                    'location': {'$exists': True, '$ne': ''}
-                }
+                '$match': match
             },
             {
                 '$sort': {'timestamp': -1}
             },
             {
-                '$limit': 50  # Limit to 50 most recent disasters
+                '$limit': limit
+            },
+            {
+                '$project': {field: 1 for field in live_disaster_query_fields(fields)}
             }
         ]
         
         reports = list(mongo.db.reports.aggregate(pipeline))
         
         # Convert ObjectId to string and add coordinates
-        live_disasters = []
-        for report in reports:
-            report['_id'] = str(report['_id'])
-            
-            # Convert timestamp to ISO format string for JavaScript compatibility
-            if 'timestamp' in report and report['timestamp']:
-                report['timestamp'] = report['timestamp'].isoformat() + 'Z'
-            
-            # Add mock coordinates based on location (in production, you'd geocode these)
-            coordinates = get_coordinates_for_location(report['location'])
-            if coordinates:
-                report['coordinates'] = coordinates
-            
-            # Determine severity based on disaster type and description
-            report['severity'] = determine_severity(report)
-            
-            live_disasters.append(report)
+        live_disasters = [format_live_disaster(report, fields) for report in reports]
         
-        print(f"📍 Returning {len(live_disasters)} live disasters")
+        logger.info("Returning live disasters", extra={'count': len(live_disasters), 'sampled': True})
         return jsonify(live_disasters)
         
     except Exception as e:
-        print(f"❌ Error fetching live disasters: {str(e)}")
+        logger.exception("Error fetching live disasters")
         return jsonify({
             'success': False,
             'error': 'Failed to fetch live disasters',
             'details': str(e)
         }), 500
 
-def get_coordinates_for_location(location):
-    """Get approximate coordinates for Indian locations (mock geocoding)"""
-    # This is a mock function. In production, use a geocoding service
-    location_coords = {
-        # Major Indian cities and states
-        'mumbai': [19.0760, 72.8777],
-        'delhi': [28.7041, 77.1025],
-        'bangalore': [12.9716, 77.5946],
-        'kolkata': [22.5726, 88.3639],
-        'chennai': [13.0827, 80.2707],
-        'hyderabad': [17.3850, 78.4867],
-        'pune': [18.5204, 73.8567],
-        'ahmedabad': [23.0225, 72.5714],
-        'jaipur': [26.9124, 75.7873],
-        'lucknow': [26.8467, 80.9462],
-        'kanpur': [26.4499, 80.3319],
-        'nagpur': [21.1458, 79.0882],
-        'indore': [22.7196, 75.8577],
-        'thane': [19.2183, 72.9781],
-        'bhopal': [23.2599, 77.4126],
-        'visakhapatnam': [17.6868, 83.2185],
-        'pimpri': [18.6298, 73.7997],
-        'patna': [25.5941, 85.1376],
-        'vadodara': [22.3072, 73.1812],
-        'ghaziabad': [28.6692, 77.4538],
-        'ludhiana': [30.9010, 75.8573],
-        'agra': [27.1767, 78.0081],
-        'nashik': [19.9975, 73.7898],
-        'faridabad': [28.4089, 77.3178],
-        'meerut': [28.9845, 77.7064],
-        'rajkot': [22.3039, 70.8022],
-        'kalyan': [19.2437, 73.1355],
-        'vasai': [19.4912, 72.8054],
-        'varanasi': [25.3176, 82.9739],
-        'srinagar': [34.0837, 74.7973],
-        'aurangabad': [19.8762, 75.3433],
-        'dhanbad': [23.7957, 86.4304],
-        'amritsar': [31.6340, 74.8723],
-        'navi mumbai': [19.0330, 73.0297],
-        'allahabad': [25.4358, 81.8463],
-        'ranchi': [23.3441, 85.3096],
-        'howrah': [22.5958, 88.2636],
-        'coimbatore': [11.0168, 76.9558],
-        'jabalpur': [23.1815, 79.9864],
-        'gwalior': [26.2183, 78.1828],
-        'vijayawada': [16.5062, 80.6480],
-        'jodhpur': [26.2389, 73.0243],
-        'madurai': [9.9252, 78.1198],
-        'raipur': [21.2514, 81.6296],
-        'kota': [25.2138, 75.8648],
-        'chandigarh': [30.7333, 76.7794],
-        'guwahati': [26.1445, 91.7362],
-        'solapur': [17.6599, 75.9064],
-        'hubli': [15.3647, 75.1240],
-        'tiruchirappalli': [10.7905, 78.7047],
-        'bareilly': [28.3670, 79.4304],
-        'mysore': [12.2958, 76.6394],
-        'tiruppur': [11.1085, 77.3411],
-        'gurgaon': [28.4595, 77.0266],
-        'aligarh': [27.8974, 78.0880],
-        'jalandhar': [31.3260, 75.5762],
-        'bhubaneswar': [20.2961, 85.8245],
-        'salem': [11.6643, 78.1460],
-        'warangal': [17.9689, 79.5941],
-        'mira': [19.2952, 72.8679],
-        'bhiwandi': [19.2812, 73.0482],
-        'thiruvananthapuram': [8.5241, 76.9366],
-        'bhilai': [21.2167, 81.3833],
-        'cuttack': [20.4625, 85.8828],
-        'firozabad': [27.1592, 78.3957],
-        'kochi': [9.9312, 76.2673],
-        'bhavnagar': [21.7645, 72.1519],
-        'dehradun': [30.3165, 78.0322],
-        'durgapur': [23.5204, 87.3119],
-        'asansol': [23.6739, 86.9524],
-        'nanded': [19.1383, 77.2975],
-        'kolhapur': [16.7050, 74.2433],
-        'ajmer': [26.4499, 74.6399],
-        'gulbarga': [17.3297, 76.8343],
-        'jamnagar': [22.4707, 70.0577],
-        'ujjain': [23.1765, 75.7885],
-        'loni': [28.7333, 77.2833],
-        'siliguri': [26.7271, 88.3953],
-        'jhansi': [25.4484, 78.5685],
-        'ulhasnagar': [19.2183, 73.1581],
-        'nellore': [14.4426, 79.9865],
-        'jammu': [32.7266, 74.8570],
-        'sangli': [16.8524, 74.5815],
-        'belgaum': [15.8497, 74.4977],
-        'mangalore': [12.9141, 74.8560],
-        'ambattur': [13.1143, 80.1548],
-        'tirunelveli': [8.7139, 77.7567],
-        'malegaon': [20.5579, 74.5287],
-        'gaya': [24.7914, 85.0002]
-    }
+def lng_to_tile_x(lng, n):
+    return min(n - 1, max(0, int((lng + 180) / 360 * n)))
+
+def lat_to_tile_y(lat, n):
+    lat = math.radians(max(-MERCATOR_MAX_LAT, min(MERCATOR_MAX_LAT, lat)))
+    return min(n - 1, max(0, int((1 - math.asinh(math.tan(lat)) / math.pi) / 2 * n)))
+
+def tile_bounds(z, x, y):
+    """(west, south, east, north) in degrees and (north, south) in mercator units for an XYZ tile"""
+    n = 2 ** z
+    north_merc = math.pi * (1 - 2 * y / n)
+    south_merc = math.pi * (1 - 2 * (y + 1) / n)
+    west = x / n * 360 - 180
+    east = (x + 1) / n * 360 - 180
+    north = math.degrees(math.atan(math.sinh(north_merc)))
+    south = math.degrees(math.atan(math.sinh(south_merc)))
+    return (west, south, east, north), (north_merc, south_merc)
+
+@lru_cache(maxsize=CLUSTER_CACHE_SIZE)
+def tile_clusters(z, x, y, reports_version, time_bucket, rules_version):
+    """Clusters for one tile.
+
+    The version, time bucket and rules arguments are only part of the cache
+    key; a write, the next minute or a rules edit moves every tile to a new key.
+    """
+    (west, south, east, north), (north_merc, south_merc) = tile_bounds(z, x, y)
+    cells = CLUSTER_GRID_CELLS
+    cell_lng = (east - west) / cells
+    cell_merc = (north_merc - south_merc) / cells
+    since = datetime.utcfromtimestamp(time_bucket * 60) - LIVE_DISASTER_WINDOW
+    levels = severity_rules.current().levels
+    
+    match = {'timestamp': {'$gte': since}, 'geo': {'$exists': True}}
+    if east - west < 180:
+        match['geo'] = {'$geoWithin': {'$geometry': bbox_polygon(west, south, east, north)}}
+    
+    lng = {'$arrayElemAt': ['$geo.coordinates', 0]}
+    lat = {'$arrayElemAt': ['$geo.coordinates', 1]}
+    mercator_y = {'$ln': {'$tan': {'$add': [math.pi / 4, {'$divide': [{'$degreesToRadians': '$lat'}, 2]}]}}}
+    
+    pipeline = [
+        {'$match': match},
+        {'$project': {
+            'lng': lng,
+            'lat': lat,
+            'disasterType': 1,
+            'rank': {'$switch': {
+                'branches': [{'case': {'$eq': ['$computedSeverity', level]}, 'then': rank}
+                             for rank, level in enumerate(levels)],
+                'default': len(levels)
+            }}
+        }},
+        # Half-open bounds so a report on a tile edge is counted once
+        {'$match': {'lng': {'$gte': west, '$lt': east}, 'lat': {'$gt': south, '$lte': north}}},
+        {'$addFields': {
+            'cx': {'$min': [cells - 1, {'$floor': {'$divide': [{'$subtract': ['$lng', west]}, cell_lng]}}]},
+            'cy': {'$min': [cells - 1, {'$floor': {'$divide': [{'$subtract': [north_merc, mercator_y]}, cell_merc]}}]}
+        }},
+        {'$group': {
+            '_id': {'cx': '$cx', 'cy': '$cy', 'type': '$disasterType'},
+            'count': {'$sum': 1},
+            'lng': {'$sum': '$lng'},
+            'lat': {'$sum': '$lat'},
+            'rank': {'$min': '$rank'},
+            'reportId': {'$first': '$_id'}
+        }},
+        # Most common type first, so $first below picks the dominant type
+        {'$sort': {'count': -1}},
+        {'$group': {
+            '_id': {'cx': '$_id.cx', 'cy': '$_id.cy'},
+            'count': {'$sum': '$count'},
+            'lng': {'$sum': '$lng'},
+            'lat': {'$sum': '$lat'},
+            'rank': {'$min': '$rank'},
+            'dominantType': {'$first': '$_id.type'},
+            'reportId': {'$first': '$reportId'}
+        }}
+    ]
+    
+    clusters = []
+    for row in reports_collection.aggregate(pipeline):
+        cluster = {
+            'coordinates': [row['lat'] / row['count'], row['lng'] / row['count']],
+            'count': row['count'],
+            'dominantType': row['dominantType'],
+            'maxSeverity': levels[row['rank']] if row['rank'] < len(levels) else None
+        }
+        if row['count'] == 1:
+            cluster['reportId'] = str(row['reportId'])
+        clusters.append(cluster)
+    return tuple(clusters)
+
+@app.route('/api/live-disasters/clusters', methods=['GET'])
+@conditional_get('reports', time_bucket=60)
+def get_live_disaster_clusters():
+    """Get live disasters merged into map clusters for a zoom level and viewport"""
+    try:
+        try:
+            zoom = int(request.args.get('zoom', ''))
+        except ValueError:
+            zoom = -1
+        bbox = parse_floats(request.args.get('bbox', ''), 4)
+        if not 0 <= zoom <= CLUSTER_MAX_ZOOM or not bbox:
+            return jsonify({
+                'success': False,
+                'error': f'zoom (0-{CLUSTER_MAX_ZOOM}) and bbox=minLng,minLat,maxLng,maxLat are required'
+            }), 400
+        
+        min_lng, min_lat, max_lng, max_lat = bbox
+        if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+            return jsonify({
+                'success': False,
+                'error': 'bbox is out of range'
+            }), 400
+        
+        n = 2 ** zoom
+        x_range = range(lng_to_tile_x(min_lng, n), lng_to_tile_x(max_lng, n) + 1)
+        y_range = range(lat_to_tile_y(max_lat, n), lat_to_tile_y(min_lat, n) + 1)
+        if len(x_range) * len(y_range) > CLUSTER_MAX_TILES:
+            return jsonify({
+                'success': False,
+                'error': 'bbox covers too many tiles at this zoom'
+            }), 400
+        
+        epoch, versions, _ = collection_versions.snapshot()
+        reports_version = f"{epoch}:{versions.get('reports', 0)}"
+        time_bucket = int(time.time() // 60)
+        rules_version = severity_rules.current().version
+        
+        clusters = []
+        for x in x_range:
+            for y in y_range:
+                clusters.extend(tile_clusters(zoom, x, y, reports_version, time_bucket, rules_version))
+        
+        return jsonify({
+            'success': True,
+            'zoom': zoom,
+            'total': sum(cluster['count'] for cluster in clusters),
+            'clusters': clusters
+        })
+        
+    except Exception:
+        logger.exception("Error clustering live disasters")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to cluster live disasters'
+        }), 500
+
+# Heatmap tiles: report density binned into a HEATMAP_GRID x HEATMAP_GRID grid per tile
+HEATMAP_GRID = int(os.environ.get('HEATMAP_GRID', '64'))
+HEATMAP_CACHE_SIZE = int(os.environ.get('HEATMAP_CACHE_SIZE', '1024'))
+HEATMAP_TIME_BUCKET_SECONDS = 300
+HEATMAP_MAX_HOURS = 30 * 24
+
+@lru_cache(maxsize=HEATMAP_CACHE_SIZE)
+def heatmap_tile(z, x, y, types, hours, time_bucket, data_version):
+    """Density grid for one tile as (cells, max count).
+
+    data_version (epoch, global heatmap version, reports added in this tile)
+    and time_bucket are only part of the cache key, so a new report rebuilds
+    just the tiles it falls in.
+    """
+    (west, south, east, north), (north_merc, south_merc) = tile_bounds(z, x, y)
+    until = datetime.utcfromtimestamp(time_bucket * HEATMAP_TIME_BUCKET_SECONDS)
+    
+    match = {'timestamp': {'$gte': until - timedelta(hours=hours)}, 'geo': {'$exists': True}}
+    if east - west < 180:
+        match['geo'] = {'$geoWithin': {'$geometry': bbox_polygon(west, south, east, north)}}
+    if 'other' in types:
+        # 'other' is every type outside DISASTER_TYPES, so exclude only the unselected ones
+        match['disasterType'] = {'$nin': [t for t in DISASTER_TYPES if t not in types]}
+    elif types:
+        match['disasterType'] = {'$in': list(types)}
+    
+    points = np.array(
+        [report['geo']['coordinates'] for report in reports_collection.find(match, {'geo.coordinates': 1, '_id': 0})],
+        dtype=float
+    ).reshape(-1, 2)
+    
+    # Position inside the tile: 0..1 across (longitude) and down (mercator y)
+    lat = np.radians(np.clip(points[:, 1], -MERCATOR_MAX_LAT, MERCATOR_MAX_LAT))
+    across = (points[:, 0] - west) / (east - west)
+    down = (north_merc - np.arcsinh(np.tan(lat))) / (north_merc - south_merc)
+    
+    counts, _, _ = np.histogram2d(down, across, bins=HEATMAP_GRID, range=[[0, 1], [0, 1]])
+    rows, cols = np.nonzero(counts)
+    
+    # Report each non-empty cell at its centre as [lat, lng, count]
+    cell_lng = west + (cols + 0.5) / HEATMAP_GRID * (east - west)
+    cell_merc = north_merc - (rows + 0.5) / HEATMAP_GRID * (north_merc - south_merc)
+    cell_lat = np.degrees(np.arctan(np.sinh(cell_merc)))
+    cells = [
+        [round(float(cell_lat[i]), 5), round(float(cell_lng[i]), 5), int(counts[rows[i], cols[i]])]
+        for i in range(len(rows))
+    ]
+    return cells, int(counts.max()) if cells else 0
+
+@app.route('/api/heatmap/<int:z>/<int:x>/<int:y>', methods=['GET'])
+@conditional_get('reports', time_bucket=HEATMAP_TIME_BUCKET_SECONDS)
+def get_heatmap_tile(z, x, y):
+    """Get report density for one map tile (?type=flood,fire&hours=24)"""
+    try:
+        if z > CLUSTER_MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+            return jsonify({
+                'success': False,
+                'error': 'Tile not found'
+            }), 404
+        
+        try:
+            hours = int(request.args.get('hours', LIVE_DISASTER_WINDOW.total_seconds() // 3600))
+        except ValueError:
+            hours = 0
+        if not 1 <= hours <= HEATMAP_MAX_HOURS:
+            return jsonify({
+                'success': False,
+                'error': f'hours must be between 1 and {HEATMAP_MAX_HOURS}'
+            }), 400
+        
+        # 'all' (the map's filter default) or no value means every type
+        types = {t.strip().lower() for t in request.args.get('type', '').split(',') if t.strip()}
+        if 'all' in types:
+            types = set()
+        unknown = sorted(types - set(DISASTER_TYPES) - {'other'})
+        if unknown:
+            return jsonify({
+                'success': False,
+                'error': f"Unknown disaster type: {', '.join(unknown)}"
+            }), 400
+        types = tuple(sorted(types))
+        
+        epoch, versions, _ = collection_versions.snapshot()
+        data_version = (epoch, versions.get('heatmap', 0), collection_versions.tile_version(z, x, y))
+        time_bucket = int(time.time() // HEATMAP_TIME_BUCKET_SECONDS)
+        
+        cells, max_count = heatmap_tile(z, x, y, types, hours, time_bucket, data_version)
+        
+        return jsonify({
+            'success': True,
+            'tile': [z, x, y],
+            'grid': HEATMAP_GRID,
+            'max': max_count,
+            'cells': cells
+        })
+        
+    except Exception:
+        logger.exception("Error building heatmap tile")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to build heatmap tile'
+        }), 500
+
+# Live disaster push feed (Server-Sent Events). Events are written to the
+# capped live_events collection and every process relays them from there to
+# its own broadcaster, so a report submitted to one worker reaches the
+# streams on all of them. Event ids are per process; clients reconnecting
+# to another process get a 'reset' event and reload the full list.
+SSE_HEARTBEAT_SECONDS = int(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_REPLAY_EVENTS = int(os.environ.get('SSE_REPLAY_EVENTS', '1000'))
+SSE_CLIENT_QUEUE_SIZE = 256
+# Past this many streams per worker new ones get a 503 and the page polls
+# /api/live-disasters instead. On the gthread API server each stream holds a
+# thread, so the default is low; gunicorn.stream.conf.py (gevent) raises it
+SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', str(max(1, int(os.environ.get('THREADS_PER_WORKER', '32')) // 4))))
+SSE_POLL_FALLBACK_SECONDS = 30
+LIVE_EVENTS_BYTES = 16 * 1024 * 1024
+# When live_events is not capped the relay polls instead of tailing. _ids
+# from different workers are not in insertion order, so each poll re-reads
+# this many seconds of events and skips the ones already published
+LIVE_EVENTS_POLL_SECONDS = float(os.environ.get('LIVE_EVENTS_POLL_SECONDS', '1'))
+LIVE_EVENTS_LOOKBACK_SECONDS = 30
+
+def format_sse(event_id, event, data):
+    """Encode one Server-Sent Events message"""
+    payload = json.dumps(data, default=str, sort_keys=True, separators=(',', ':'))
+    return f'id: {event_id}\nevent: {event}\ndata: {payload}\n\n'
+
+class SSESubscriber:
+    """One connected stream; dropped if it falls too far behind"""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=SSE_CLIENT_QUEUE_SIZE)
+        self.dropped = False
+
+class TooManyStreams(Exception):
+    """Raised when this process already serves SSE_MAX_STREAMS live streams"""
+
+class DisasterBroadcaster:
+    """Fans out new/changed disasters to SSE subscribers and keeps a short replay log"""
+
+    def __init__(self, replay_size, max_subscribers):
+        self.lock = threading.Lock()
+        self.max_subscribers = max_subscribers
+        self.boot_id = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self.log = deque(maxlen=replay_size)
+        self.subscribers = set()
+
+    def event_id(self, sequence):
+        return f'{self.boot_id}-{sequence}'
+
+    def publish(self, event, data):
+        with self.lock:
+            self.sequence += 1
+            message = format_sse(self.event_id(self.sequence), event, data)
+            self.log.append((self.sequence, message))
+            for subscriber in list(self.subscribers):
+                try:
+                    subscriber.queue.put_nowait(message)
+                except queue.Full:
+                    # The client reconnects with Last-Event-ID and catches up from the log
+                    subscriber.dropped = True
+                    self.subscribers.discard(subscriber)
+
+    def subscribe(self, last_event_id=None):
+        """Register a subscriber; returns (subscriber, missed messages, current event id or None if in sync)"""
+        subscriber = SSESubscriber()
+        with self.lock:
+            if len(self.subscribers) >= self.max_subscribers:
+                raise TooManyStreams()
+            backlog, reset = self.replay(last_event_id)
+            self.subscribers.add(subscriber)
+            reset_id = self.event_id(self.sequence) if reset else None
+        return subscriber, backlog, reset_id
+
+    def replay(self, last_event_id):
+        """Messages after last_event_id, and whether the client must reload instead"""
+        if not last_event_id:
+            return [], False
+        boot_id, _, sequence = last_event_id.partition('-')
+        if boot_id != self.boot_id or not sequence.isdigit() or int(sequence) > self.sequence:
+            return [], True
+        sequence = int(sequence)
+        if self.log and sequence < self.log[0][0] - 1:
+            return [], True
+        return [message for seq, message in self.log if seq > sequence], False
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def close(self):
+        """End every open stream (clients reconnect to another worker)"""
+        with self.lock:
+            for subscriber in self.subscribers:
+                try:
+                    subscriber.queue.put_nowait(None)
+                except queue.Full:
+                    subscriber.dropped = True
+            self.subscribers.clear()
+
+broadcaster = DisasterBroadcaster(SSE_REPLAY_EVENTS, SSE_MAX_STREAMS)
+
+def create_live_events_collection():
+    """Create the capped collection live events are relayed through"""
+    try:
+        mongo.db.create_collection('live_events', capped=True, size=LIVE_EVENTS_BYTES, max=SSE_REPLAY_EVENTS)
+    except CollectionInvalid:
+        pass  # created by another worker or an earlier run
+    except Exception as e:
+        logger.warning("Live events collection creation failed, relaying by polling: %s", e)
+
+class LiveEventRelay:
+    """Tails live_events and publishes each event to this process's broadcaster"""
+
+    def __init__(self):
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def tail(self, resumed):
+        """Follow the capped collection in insertion order until stopped or the cursor dies"""
+        latest = live_events_collection.find_one({}, sort=[('$natural', -1)])
+        if latest is None:
+            # A tailable cursor on an empty capped collection dies at once
+            latest = {'_id': live_events_collection.insert_one({'event': None, 'createdAt': datetime.utcnow()}).inserted_id}
+        
+        # Skip what was published before this cursor opened; everything after
+        # the latest event is relayed in the order it was inserted
+        cursor = live_events_collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+        if resumed:
+            broadcaster.publish('reset', {})
+        caught_up = False
+        while cursor.alive and not self.stopped.is_set():
+            for event in cursor:
+                if not caught_up:
+                    caught_up = event['_id'] == latest['_id']
+                elif event['event']:
+                    broadcaster.publish(event['event'], event['data'])
+
+    def poll(self, resumed):
+        """Publish new events by re-reading a lookback window until stopped"""
+        seen = None
+        while not self.stopped.is_set():
+            window = ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=LIVE_EVENTS_LOOKBACK_SECONDS))
+            events = list(live_events_collection.find({'_id': {'$gte': window}}).sort('_id', 1))
+            if seen is None and resumed:
+                broadcaster.publish('reset', {})
+            if seen is not None:
+                for event in events:
+                    if event['_id'] not in seen and event['event']:
+                        broadcaster.publish(event['event'], event['data'])
+            seen = {event['_id'] for event in events}
+            self.stopped.wait(LIVE_EVENTS_POLL_SECONDS)
+
+    def run(self):
+        with app.app_context():
+            resumed = False
+            failed = False
+            while not self.stopped.is_set():
+                try:
+                    # After the first run the previous cursor has ended and events
+                    # may have been missed, so open streams get a 'reset' to reload
+                    if live_events_collection.options().get('capped', False):
+                        self.tail(resumed)
+                    else:
+                        self.poll(resumed)
+                    failed = False
+                except Exception as e:
+                    if not failed:
+                        logger.warning("Live event relay failed: %s", e)
+                    failed = True
+                resumed = True
+                self.stopped.wait(LIVE_EVENTS_POLL_SECONDS)
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name='live-event-relay', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+live_event_relay = LiveEventRelay()
+
+def relay_live_events(events):
+    """Write (event, data) pairs to live_events for every process to publish"""
+    if not events:
+        return
+    now = datetime.utcnow()
+    try:
+        live_events_collection.insert_many(
+            [{'event': event, 'data': data, 'createdAt': now} for event, data in events]
+        )
+    except Exception as e:
+        # Streams on this worker still get the events
+        logger.warning("Live event relay write failed, publishing locally: %s", e)
+        for event, data in events:
+            broadcaster.publish(event, data)
+
+def live_disaster_event(report):
+    """The 'disaster' event for a new or changed report, or None if it is outside the live window"""
+    try:
+        timestamp = report.get('timestamp')
+        if not report.get('location') or not timestamp or timestamp < datetime.utcnow() - LIVE_DISASTER_WINDOW:
+            return None
+        fields = REPORT_VIEWS['map']
+        return ('disaster', format_live_disaster(dict(report), fields))
+    except Exception as e:
+        logger.warning("Live feed publish failed: %s", e)
+        return None
+
+def publish_live_disaster(report):
+    """Push a new or changed report to live map subscribers if it is within the live window"""
+    publish_live_disasters([report])
+
+def publish_live_disasters(reports):
+    """Push a batch of reports, or one 'reset' if there are more than BULK_PUBLISH_LIMIT"""
+    if len(reports) > BULK_PUBLISH_LIMIT:
+        relay_live_events([('reset', {})])
+        return
+    events = [live_disaster_event(report) for report in reports]
+    relay_live_events([event for event in events if event])
+
+@app.route('/api/live-disasters/stream', methods=['GET'])
+def stream_live_disasters():
+    """Server-Sent Events feed of new and changed live disasters (map view)"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        subscriber, backlog, reset_id = broadcaster.subscribe(last_event_id)
+    except TooManyStreams:
+        # Keep threads free for ordinary requests; the page polls instead
+        response = jsonify({
+            'success': False,
+            'error': 'Live stream limit reached, poll /api/live-disasters instead',
+            'pollSeconds': SSE_POLL_FALLBACK_SECONDS
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(SSE_POLL_FALLBACK_SECONDS)
+        return response
+    
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            if reset_id:
+                # Too far behind (or a different server process): reload the full list
+                yield format_sse(reset_id, 'reset', {})
+            for message in backlog:
+                yield message
+            while not subscriber.dropped:
+                try:
+                    message = subscriber.queue.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if message is None:
+                    # Server shutting down
+                    return
+                yield message
+        finally:
+            broadcaster.unsubscribe(subscriber)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+class PinnedGeocodes:
+    """Process-local copy of the pinned geocode_cache entries.
+
+    Corrections are made by hand in MongoDB, so they are picked up within
+    GEOCODE_PINNED_SECONDS instead of waiting for the LRU to evict a key.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.loaded_at = None
+
+    def refresh(self):
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at <= GEOCODE_PINNED_SECONDS:
+            return
+        try:
+            entries = {
+                doc['_id']: (
+                    tuple(doc['coordinates']) if doc.get('coordinates') else None,
+                    doc.get('source', 'unknown'),
+                    doc.get('state')
+                )
+                for doc in geocode_cache_collection.find(
+                    {'pinned': True}, {'coordinates': 1, 'source': 1, 'state': 1}
+                )
+            }
+        except Exception as e:
+            logger.warning("Pinned geocode read failed: %s", e)
+            entries = None
+        with self.lock:
+            if entries is not None:
+                self.entries = entries
+            self.loaded_at = time.monotonic()
+
+    def get(self, key):
+        """(coordinates, source, state) for a pinned key, or None"""
+        self.refresh()
+        with self.lock:
+            return self.entries.get(key)
+
+pinned_geocodes = PinnedGeocodes()
+
+def geocode_normalized(key):
+    """Geocode a normalized location string; pinned corrections win over cached results"""
+    pinned = pinned_geocodes.get(key)
+    if pinned:
+        return pinned
+    return cached_geocode(key)
+
+@lru_cache(maxsize=GEOCODE_CACHE_SIZE)
+def cached_geocode(key):
+    """Geocode a normalized location string through the persistent geocode cache.
+
+    Entries computed from another gazetteer version are recomputed; entries
+    marked 'pinned' are manual corrections and always win.
+    """
+    try:
+        cached = geocode_cache_collection.find_one({'_id': key})
+        if cached and (cached.get('pinned') or cached.get('gazetteerVersion') == gazetteer.version):
+            coordinates = tuple(cached['coordinates']) if cached.get('coordinates') else None
+            return coordinates, cached.get('source', 'unknown'), cached.get('state')
+    except Exception as e:
+        logger.warning("Geocode cache read failed: %s", e)
     
-    # Try to find coordinates for the location
-    location_lower = location.lower()
+    result = gazetteer.geocode(key)
     
-    # Direct match
-    if location_lower in location_coords:
-        return location_coords[location_lower]
+    try:
+        geocode_cache_collection.update_one(
+            {'_id': key, 'pinned': {'$ne': True}},
+            {'$set': {
+                'coordinates': result['coordinates'],
+                'source': result['source'],
+                'state': result['state'],
+                'gazetteerVersion': gazetteer.version,
+                'updatedAt': datetime.utcnow()
+            }},
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning("Geocode cache write failed: %s", e)
     
-    # Try partial matches
-    for city, coords in location_coords.items():
-        if city in location_lower or location_lower in city:
-            return coords
+    coordinates = tuple(result['coordinates']) if result['coordinates'] else None
+    return coordinates, result['source'], result['state']
+
+def geocode_location(location):
+    """Resolve a location to ([lat, lng] or None, source); same input always gives the same output"""
+    coordinates, source, _ = geocode_normalized(normalize_location(location))
+    return (list(coordinates) if coordinates else None), source
+
+def get_coordinates_for_location(location):
+    """Get approximate coordinates for an Indian location, or None if it is unknown"""
+    coordinates, _ = geocode_location(location)
+    return coordinates
+
+def resolve_report_coordinates(data, location):
+    """Return ([lat, lng], source) for a new report: reporter GPS first, then the geocoder"""
+    coordinates = normalize_coordinates(data.get('coordinates'))
+    if coordinates:
+        return coordinates, 'gps'
     
-    # If no match found, return random coordinates within India
-    import random
-    # India bounding box: roughly 8°N to 37°N, 68°E to 97°E
-    lat = random.uniform(8.0, 37.0)
-    lng = random.uniform(68.0, 97.0)
-    return [lat, lng]
+    return geocode_location(location)
 
 def determine_severity(report):
     """Determine disaster severity based on type and description"""
-    disaster_type = report.get('disasterType', '').lower()
-    description = report.get('description', '').lower()
-    
-    # High severity indicators
-    high_severity_keywords = ['major', 'severe', 'massive', 'catastrophic', 'emergency', 'critical', 'death', 'casualties', 'evacuation']
-    medium_severity_keywords = ['moderate', 'significant', 'considerable', 'damage', 'injured', 'affected']
-    
-    # Check for high severity keywords
-    for keyword in high_severity_keywords:
-        if keyword in description:
-            return 'high'
-    
-    # Check for medium severity keywords
-    for keyword in medium_severity_keywords:
-        if keyword in description:
-            return 'medium'
-    
-    # Disaster type based severity
-    if disaster_type in ['earthquake', 'cyclone', 'fire']:
-        return 'high'
-    elif disaster_type in ['flood', 'landslide']:
-        return 'medium'
-    else:
-        return 'low'
+    return severity_rules.current().classify(report.get('disasterType'), report.get('description'))
+
+@app.route('/api/admin/db-stats', methods=['GET'])
+@require_auth('admin')
+def get_db_stats():
+    """MongoDB time by query shape and by route, summed across worker processes (admin function)"""
+    try:
+        limit = min(max(int(request.args.get('limit', DB_STATS_DEFAULT_LIMIT)), 1), DB_STATS_MAX_LIMIT)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'limit must be an integer'
+        }), 400
+    
+    try:
+        snapshots = request_metrics.collect()
+        totals = merge_snapshots(snapshot.get('db', {}) for snapshot in snapshots)
+        
+        shapes = []
+        for fingerprint, stats in totals['shapes'].items():
+            shapes.append(dict(
+                stats,
+                fingerprint=fingerprint,
+                totalMs=round(stats['totalMs'], 2),
+                maxMs=round(stats['maxMs'], 2),
+                avgMs=round(stats['totalMs'] / stats['calls'], 2)
+            ))
+        shapes.sort(key=lambda stats: stats['totalMs'], reverse=True)
+        
+        routes = [
+            {
+                'route': route,
+                'calls': stats['calls'],
+                'totalMs': round(stats['totalMs'], 2),
+                'avgMs': round(stats['totalMs'] / stats['calls'], 2)
+            }
+            for route, stats in totals['routes'].items()
+        ]
+        routes.sort(key=lambda stats: stats['totalMs'], reverse=True)
+        
+        return jsonify({
+            'success': True,
+            'processes': len(snapshots),
+            'slowQueryMs': SLOW_QUERY_MS,
+            'shapes': shapes[:limit],
+            'routes': routes[:limit],
+            'slowLog': totals['slowLog'][:limit]
+        })
+        
+    except Exception:
+        logger.exception("Error collecting database stats")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to collect database stats'
+        }), 500
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Per-route latency, response size and in-flight metrics in Prometheus text format"""
+    # Off unless a token is configured; behind a local proxy every client looks like loopback
+    if not METRICS_TOKEN:
+        return jsonify({
+            'success': False,
+            'error': 'Not found'
+        }), 404
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+        return jsonify({
+            'success': False,
+            'error': 'Authentication required'
+        }), 401
+    
+    try:
+        return Response(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    except Exception:
+        logger.exception("Error rendering metrics")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to collect metrics'
+        }), 500
 
 # Database connection test endpoint
 @app.route('/api/health', methods=['GET'])
@@ -1021,7 +3024,9 @@ def health_check():
             'success': True,
             'message': 'Application and database are healthy',
             'timestamp': datetime.utcnow().isoformat(),
-            'database': 'MongoDB connected'
+            'database': 'MongoDB connected',
+            'emailConfigured': email_config_valid,
+            'emailOutbox': outbox_backlog()
         })
         
     except Exception as e:
@@ -1035,13 +3040,14 @@ def health_check():
 def test_email():
     """Test email configuration by sending a test email"""
     try:
-        # Print current configuration for debugging
-        print("🔧 EMAIL CONFIGURATION DEBUG:")
-        print(f"   MAIL_SERVER: {app.config['MAIL_SERVER']}")
-        print(f"   MAIL_PORT: {app.config['MAIL_PORT']}")
-        print(f"   MAIL_USERNAME: {app.config['MAIL_USERNAME']}")
-        print(f"   MAIL_PASSWORD: {'SET' if app.config['MAIL_PASSWORD'] else 'NOT SET'}")
-        print(f"   ADMIN_EMAIL: {ADMIN_EMAIL}")
+        # Log current configuration for debugging
+        logger.debug("Email configuration", extra={
+            'mailServer': app.config['MAIL_SERVER'],
+            'mailPort': app.config['MAIL_PORT'],
+            'mailUsername': app.config['MAIL_USERNAME'],
+            'mailPasswordSet': bool(app.config['MAIL_PASSWORD']),
+            'adminEmail': ADMIN_EMAIL
+        })
         
         # Create test message
         test_result = send_email_to_admin(
@@ -1070,7 +3076,7 @@ def test_email():
             }), 500
             
     except Exception as e:
-        print(f"❌ Test email error: {e}")
+        logger.exception("Test email error")
         return jsonify({
             'success': False,
             'error': f'Test email failed: {str(e)}',
@@ -1080,7 +3086,18 @@ def test_email():
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
-    return render_template('index.html'), 404
+    """Answer misses from memory: JSON for the API, plain text for non-page files, else the home page"""
+    if request.path.startswith('/api/'):
+        return jsonify({
+            'success': False,
+            'error': 'Not found'
+        }), 404
+    
+    # Scans for .php, .env, backups and the like get a plain text answer
+    filename = request.path.rsplit('/', 1)[-1].lower()
+    if '.' in filename and not filename.endswith('.html'):
+        return Response('Not Found', status=404, mimetype='text/plain')
+    return render_page('index.html', status=404)
 
 @app.errorhandler(500)
 def internal_error(error):
@@ -1089,11 +3106,77 @@ def internal_error(error):
         'error': 'Internal server error'
     }), 500
 
+# Process setup. Everything that holds sockets or threads is created here,
+# after the WSGI server has forked its workers, never at import time.
+initialized_pid = None
+
+def create_app():
+    """Initialize MongoDB, indexes and background workers for this process and return the app"""
+    global initialized_pid
+    if initialized_pid == os.getpid():
+        return app
+    initialized_pid = os.getpid()
+    
+    # A client or threads inherited from a parent process are unusable after fork
+    setup_logging(log_context)
+    mongo.init_app(app, event_listeners=[command_monitor])
+    email_worker_threads.clear()
+    outbox_shutdown.clear()
+    
+    # Initialize database indexes
+    create_report_index()
+    create_pagination_indexes()
+    create_user_indexes()
+    create_outbox_indexes()
+    create_auth_indexes()
+    create_live_events_collection()
+    
+    # Every worker must sign with the same key or tokens only work on the worker that issued them
+    if not app.config['SECRET_KEY']:
+        try:
+            app.config['SECRET_KEY'] = shared_secret_key(mongo.db)
+            logger.warning("SECRET_KEY not set - using the generated key stored in MongoDB")
+        except Exception as e:
+            app.config['SECRET_KEY'] = os.urandom(32).hex()
+            logger.warning("SECRET_KEY not set and MongoDB unavailable, tokens will not survive a restart: %s", e)
+    token_signer.configure(app.config['SECRET_KEY'])
+    
+    # Build the dashboard counters document on first run (see counters.py)
+    try:
+        ensure_stats(mongo.db)
+    except Exception as e:
+        logger.warning("Dashboard counters initialization failed: %s", e)
+    
+    page_cache.warm()
+    start_email_workers()
+    last_login_buffer.start()
+    request_metrics.start()
+    live_event_relay.start()
+    atexit.register(stop_email_workers)
+    atexit.register(last_login_buffer.stop)
+    atexit.register(request_metrics.stop)
+    atexit.register(live_event_relay.stop)
+    return app
+
+def begin_shutdown():
+    """Start a graceful shutdown: close live streams and let email workers finish.
+
+    Safe to call from a signal handler; in-flight requests keep running.
+    """
+    logger.info("Worker %d shutting down", os.getpid())
+    live_event_relay.stopped.set()
+    broadcaster.close()
+    outbox_shutdown.set()
+    outbox_wakeup.set()
+
 if __name__ == '__main__':
     print("🚀 Starting Disaster Alert System with MongoDB...")
     print("📍 Open your browser and go to: http://localhost:5000")
     print("�️  MongoDB URI:", app.config['MONGO_URI'])
     print("�🛑 Press Ctrl+C to stop the server")
+    print("🏭 For production use: gunicorn -c gunicorn.conf.py wsgi:app")
+    
+    create_app()
     
     try:
         # Test database connection
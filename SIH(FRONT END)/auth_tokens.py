@@ -0,0 +1,108 @@
+"""
+Signed session tokens for the Disaster Alert System
+Login issues a URL-safe token signed with the app's SECRET_KEY (itsdangerous)
+that carries the user's id, role and verified flag, so protected routes are
+authorized with a signature check instead of a users lookup. Tokens that are
+logged out early go on a small revocation list until they would expire.
+"""
+
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta, timezone
+import os
+import secrets
+import threading
+
+AUTH_TOKEN_SECONDS = int(os.environ.get('AUTH_TOKEN_SECONDS', str(12 * 60 * 60)))
+TOKEN_SALT = 'auth-token'
+SETTINGS_ID = 'auth'
+
+class TokenError(ValueError):
+    """Raised for tokens that are malformed, tampered with, expired or revoked"""
+
+class TokenSigner:
+    """Issues and verifies tokens; configure() must be called with the secret key first"""
+
+    def __init__(self, max_age=AUTH_TOKEN_SECONDS):
+        self.max_age = max_age
+        self.serializer = None
+
+    def configure(self, secret_key):
+        self.serializer = URLSafeTimedSerializer(secret_key, salt=TOKEN_SALT)
+
+    def issue(self, user):
+        """Return a token for a user document"""
+        claims = {
+            'id': str(user['_id']),
+            'role': user.get('userType', 'citizen'),
+            'verified': bool(user.get('verified', False)),
+            'jti': secrets.token_urlsafe(12)
+        }
+        return self.serializer.dumps(claims)
+
+    def verify(self, token):
+        """Return the token's claims plus its expiry time ('exp', naive UTC)"""
+        try:
+            claims, issued_at = self.serializer.loads(token, max_age=self.max_age, return_timestamp=True)
+        except SignatureExpired:
+            raise TokenError('Token has expired')
+        except BadSignature:
+            raise TokenError('Invalid token')
+
+        if not isinstance(claims, dict) or not {'id', 'role', 'jti'} <= claims.keys():
+            raise TokenError('Invalid token')
+        issued_at = issued_at.astimezone(timezone.utc).replace(tzinfo=None)
+        claims['exp'] = issued_at + timedelta(seconds=self.max_age)
+        return claims
+
+class RevocationList:
+    """Process-local copy of the revoked token ids in MongoDB.
+
+    Revoking bumps the collection's write version (see counters.py); each
+    process reloads the list only when that version changes.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.lock = threading.Lock()
+        self.version = None
+        self.revoked = {}
+
+    def revoke(self, jti, expires_at):
+        """Record a token id until its expiry (a TTL index removes it after that)"""
+        self.collection.update_one(
+            {'_id': jti},
+            {'$setOnInsert': {'expiresAt': expires_at, 'revokedAt': datetime.utcnow()}},
+            upsert=True
+        )
+        with self.lock:
+            self.revoked[jti] = expires_at
+
+    def sync(self, version):
+        """Reload the revoked ids if the write version moved since the last load"""
+        if version == self.version:
+            return
+        docs = self.collection.find({'expiresAt': {'$gt': datetime.utcnow()}}, {'expiresAt': 1})
+        revoked = {doc['_id']: doc['expiresAt'] for doc in docs}
+        with self.lock:
+            self.revoked = revoked
+            self.version = version
+
+    def is_revoked(self, jti):
+        with self.lock:
+            return jti in self.revoked
+
+def shared_secret_key(db):
+    """A generated signing key kept in MongoDB so every worker and restart agrees on it"""
+    try:
+        doc = db.settings.find_one_and_update(
+            {'_id': SETTINGS_ID},
+            {'$setOnInsert': {'secretKey': secrets.token_hex(32)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Another worker created it first
+        doc = db.settings.find_one({'_id': SETTINGS_ID})
+    return doc['secretKey']
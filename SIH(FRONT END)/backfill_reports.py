@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Backfill script for the Disaster Alert System
+Recomputes fields that are derived at ingest on existing reports, so
+/api/live-disasters never has to geocode or classify on read:
+  --coordinates  store gazetteer coordinates on reports that have none, and
+                 the GeoJSON 'geo' point used by viewport/radius queries
+  --severity     recompute computedSeverity for reports classified with
+                 older rules (run after editing data/severity_rules.json)
+  --photos       move base64 photos embedded in reports to the photo store
+With no flags, every backfill runs.
+"""
+
+from pymongo import MongoClient, UpdateOne
+from gazetteer import Gazetteer, geojson_point, normalize_coordinates
+from severity import SeverityClassifier
+from photo_store import PhotoStore, PhotoError
+from counters import increment_stats
+import argparse
+import os
+
+# MongoDB connection
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/disaster_alert_db')
+DATABASE_NAME = 'disaster_alert_db'
+BATCH_SIZE = 500
+
+def backfill_coordinates(reports_collection, gazetteer):
+    """Normalize or resolve coordinates (and the GeoJSON point) on reports missing them"""
+    updates = []
+    resolved = 0
+    unresolved = 0
+
+    query = {'$or': [
+        {'coordinates': {'$exists': False}},
+        {'coordinates': None},
+        {'coordinates': {'$type': 'object'}},
+        {'geocodeSource': {'$exists': False}},
+        {'coordinates.0': {'$exists': True}, 'geo': {'$exists': False}}
+    ]}
+
+    for report in reports_collection.find(query, {'coordinates': 1, 'location': 1, 'geocodeSource': 1}):
+        coordinates = normalize_coordinates(report.get('coordinates'))
+        source = report.get('geocodeSource') or 'gps'
+        if not coordinates:
+            result = gazetteer.geocode(report.get('location', ''))
+            coordinates, source = result['coordinates'], result['source']
+
+        if coordinates:
+            resolved += 1
+        else:
+            unresolved += 1
+
+        update = {'$set': {'coordinates': coordinates, 'geocodeSource': source}}
+        if coordinates:
+            update['$set']['geo'] = geojson_point(coordinates)
+        else:
+            update['$unset'] = {'geo': ''}
+        updates.append(UpdateOne({'_id': report['_id']}, update))
+        if len(updates) >= BATCH_SIZE:
+            reports_collection.bulk_write(updates, ordered=False)
+            updates = []
+
+    if updates:
+        reports_collection.bulk_write(updates, ordered=False)
+
+    print(f"📍 Coordinates: {resolved} resolved, {unresolved} unresolved")
+
+def backfill_severity(reports_collection, classifier):
+    """Recompute computedSeverity on reports not classified with the current rules"""
+    updates = []
+    changed = 0
+    total = 0
+
+    query = {'severityRulesVersion': {'$ne': classifier.version}}
+    projection = {'disasterType': 1, 'description': 1, 'computedSeverity': 1}
+
+    for report in reports_collection.find(query, projection):
+        total += 1
+        computed = classifier.classify(report.get('disasterType'), report.get('description'))
+        if computed != report.get('computedSeverity'):
+            changed += 1
+
+        updates.append(UpdateOne(
+            {'_id': report['_id']},
+            {'$set': {'computedSeverity': computed, 'severityRulesVersion': classifier.version}}
+        ))
+        if len(updates) >= BATCH_SIZE:
+            reports_collection.bulk_write(updates, ordered=False)
+            updates = []
+
+    if updates:
+        reports_collection.bulk_write(updates, ordered=False)
+
+    print(f"🚦 Severity: {total} reports reclassified, {changed} changed level")
+
+def backfill_photos(reports_collection, photo_store):
+    """Replace embedded data URL photos with photo store references"""
+    migrated = 0
+    failed = 0
+
+    query = {'photos': {'$elemMatch': {'$type': 'string'}}}
+    for report in reports_collection.find(query, {'photos': 1}):
+        try:
+            photos = photo_store.store_photos(report['photos'])
+        except PhotoError as e:
+            failed += 1
+            print(f"⚠️ Report {report['_id']}: {e}")
+            continue
+
+        reports_collection.update_one({'_id': report['_id']}, {'$set': {'photos': photos}})
+        migrated += 1
+
+    print(f"📸 Photos: {migrated} reports migrated, {failed} skipped")
+
+def backfill_reports(coordinates=True, severity=True, photos=True):
+    """Run the selected report backfills"""
+    try:
+        # Connect to MongoDB
+        client = MongoClient(MONGO_URI)
+        db = client[DATABASE_NAME]
+
+        print("🔌 Connecting to MongoDB...")
+        client.admin.command('ping')
+        print("✅ MongoDB connection successful!")
+
+        if coordinates:
+            gazetteer = Gazetteer.load()
+            print(f"🗺️  Gazetteer loaded: {gazetteer.size} places")
+            backfill_coordinates(db.reports, gazetteer)
+
+        if severity:
+            classifier = SeverityClassifier.load()
+            print(f"🚦 Severity rules loaded (version {classifier.version})")
+            backfill_severity(db.reports, classifier)
+
+        if photos:
+            backfill_photos(db.reports, PhotoStore())
+
+        # Invalidate cached API responses (ETags) built from the old documents
+        increment_stats(db, {}, touched=('reports', 'heatmap'))
+
+        print("\n🎉 Backfill completed successfully!")
+        client.close()
+
+    except Exception as e:
+        print(f"❌ Backfill failed: {e}")
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfill derived fields on disaster reports')
+    parser.add_argument('--coordinates', action='store_true', help='store coordinates on reports missing them')
+    parser.add_argument('--severity', action='store_true', help='recompute computedSeverity with the current rules')
+    parser.add_argument('--photos', action='store_true', help='move embedded photos to the photo store')
+    args = parser.parse_args()
+    run_all = not (args.coordinates or args.severity or args.photos)
+
+    print("🛠️  Report Backfill for Disaster Alert System")
+    print("=" * 50)
+
+    backfill_reports(
+        coordinates=run_all or args.coordinates,
+        severity=run_all or args.severity,
+        photos=run_all or args.photos
+    )
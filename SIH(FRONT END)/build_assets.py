@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Static asset build for the Disaster Alert System
+Each run of local stylesheets or scripts a page loads back to back becomes
+one minified bundle, written to dist/assets/ under a content-hashed name with
+precompressed .gz and .br copies. Copies of the HTML pages that load the
+bundles are written to dist/. The server serves dist/ when it exists, so run
+this after changing anything in css/, js/ or the pages, then restart.
+"""
+
+from datetime import datetime
+import brotli
+import glob
+import gzip
+import hashlib
+import json
+import os
+import rcssmin
+import re
+import rjsmin
+import shutil
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BUILD_DIR = os.path.join(ROOT, 'dist')
+ASSET_URL_PREFIX = '/assets/'
+MANIFEST_NAME = 'manifest.json'
+
+# Only files from these directories are bundled
+ASSET_DIRS = {'css': 'css', 'js': 'js'}
+
+# Compressed copies are only kept when they save at least this much
+MIN_COMPRESSION_SAVING = 0.1
+COMPRESSED_SUFFIXES = {'br': 'br', 'gzip': 'gz'}
+
+ASSET_TAG_PATTERN = re.compile(r'<link\b[^>]*>|<script\b[^>]*>\s*</script>', re.IGNORECASE)
+ATTRIBUTE_PATTERN = re.compile(r'([\w-]+)\s*=\s*(["\'])(.*?)\2', re.DOTALL)
+CSS_IMPORT_PATTERN = re.compile(
+    r'@import\s+(?:url\(\s*)?(["\']?)([^"\')\s]+)\1\s*\)?\s*([^;]*);',
+    re.IGNORECASE
+)
+CSS_URL_PATTERN = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)', re.IGNORECASE)
+CSS_CHARSET_PATTERN = re.compile(r'@charset\s+["\'][^"\']*["\']\s*;', re.IGNORECASE)
+
+def is_remote(url):
+    return url.startswith(('http:', 'https:', '//', 'data:'))
+
+def page_paths():
+    """Every HTML page in the tree, as paths relative to ROOT"""
+    pages = glob.glob(os.path.join(ROOT, '*.html'))
+    pages += glob.glob(os.path.join(ROOT, 'pages', '**', '*.html'), recursive=True)
+    return sorted(os.path.relpath(path, ROOT).replace(os.sep, '/') for path in pages)
+
+def asset_source(page, tag):
+    """Return (kind, path relative to ROOT) for a bundleable tag, or None"""
+    attributes = {name.lower(): value for name, _, value in ATTRIBUTE_PATTERN.findall(tag)}
+    if tag[:5].lower() == '<link':
+        if attributes.get('rel', '').lower() != 'stylesheet' or set(attributes) - {'rel', 'href', 'type'}:
+            return None
+        kind, url = 'css', attributes.get('href', '')
+    else:
+        # Scripts with defer/async/module/integrity etc. are left alone
+        if set(attributes) - {'src', 'type'} or attributes.get('type', 'text/javascript') != 'text/javascript':
+            return None
+        kind, url = 'js', attributes.get('src', '')
+
+    if not url or is_remote(url) or '?' in url or '#' in url:
+        return None
+    if url.startswith('/'):
+        path = os.path.normpath(url.lstrip('/'))
+    else:
+        path = os.path.normpath(os.path.join(os.path.dirname(page), url))
+    path = path.replace(os.sep, '/')
+    if path.split('/')[0] != ASSET_DIRS[kind] or not path.endswith(f'.{kind}'):
+        return None
+    if not os.path.isfile(os.path.join(ROOT, path)):
+        print(f"⚠️ {page}: {url} does not exist, left as is")
+        return None
+    return kind, path
+
+def asset_runs(page, html):
+    """Group the page's bundleable tags into runs of the same kind with only whitespace between them"""
+    runs = []
+    for match in ASSET_TAG_PATTERN.finditer(html):
+        source = asset_source(page, match.group(0))
+        if source is None:
+            continue
+        kind, path = source
+        previous = runs[-1] if runs else None
+        if previous and previous['kind'] == kind and not html[previous['end']:match.start()].strip():
+            previous['sources'].append(path)
+            previous['end'] = match.end()
+        else:
+            runs.append({'kind': kind, 'sources': [path], 'start': match.start(), 'end': match.end()})
+    return runs
+
+def read_text(path):
+    with open(os.path.join(ROOT, path), encoding='utf-8-sig') as f:
+        return f.read()
+
+def flatten_css(path, remote_imports, seen=()):
+    """Return a stylesheet with local @imports inlined and relative url()s made absolute.
+
+    Remote @imports are collected into remote_imports, since @import is only
+    valid at the top of the bundle.
+    """
+    if path in seen:
+        return ''
+    seen = seen + (path,)
+    directory = os.path.dirname(path)
+
+    def resolve(url):
+        return '/' + os.path.normpath(os.path.join(directory, url)).replace(os.sep, '/')
+
+    def inline_import(match):
+        url, media = match.group(2), match.group(3).strip()
+        if is_remote(url):
+            remote_imports.append(match.group(0))
+            return ''
+        css = flatten_css(resolve(url).lstrip('/'), remote_imports, seen)
+        return f'@media {media}{{{css}}}' if media else css
+
+    def absolute_url(match):
+        url = match.group(2).strip()
+        if is_remote(url) or url.startswith(('/', '#')):
+            return match.group(0)
+        return f'url("{resolve(url)}")'
+
+    css = CSS_CHARSET_PATTERN.sub('', read_text(path))
+    css = CSS_IMPORT_PATTERN.sub(inline_import, css)
+    return CSS_URL_PATTERN.sub(absolute_url, css)
+
+def bundle_content(kind, sources):
+    """Concatenate and minify a run of stylesheets or scripts"""
+    if kind == 'css':
+        remote_imports = []
+        css = '\n'.join(flatten_css(path, remote_imports) for path in sources)
+        return rcssmin.cssmin('\n'.join(remote_imports + [css]))
+
+    # Each script is terminated so the next one cannot continue its last statement
+    return ';\n'.join(rjsmin.jsmin(read_text(path)).strip() for path in sources) + ';\n'
+
+def precompress(data):
+    """Return {content coding: compressed bytes} for the codings worth serving"""
+    variants = {
+        'br': brotli.compress(data, quality=11),
+        'gzip': gzip.compress(data, compresslevel=9, mtime=0)
+    }
+    return {
+        coding: compressed for coding, compressed in variants.items()
+        if len(compressed) <= len(data) * (1 - MIN_COMPRESSION_SAVING)
+    }
+
+def write_asset(assets_dir, name, data):
+    """Write an asset and its .gz/.br copies; returns the sizes written"""
+    sizes = {'raw': len(data)}
+    with open(os.path.join(assets_dir, name), 'wb') as f:
+        f.write(data)
+
+    for coding, compressed in precompress(data).items():
+        suffix = COMPRESSED_SUFFIXES[coding]
+        with open(os.path.join(assets_dir, f'{name}.{suffix}'), 'wb') as f:
+            f.write(compressed)
+        sizes[suffix] = len(compressed)
+    return sizes
+
+def build(build_dir=BUILD_DIR):
+    """Build every page and its bundles into build_dir, replacing the previous build"""
+    staging_dir = f'{build_dir}.tmp-{os.getpid()}'
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    assets_dir = os.path.join(staging_dir, 'assets')
+    os.makedirs(assets_dir)
+
+    manifest = {'builtAt': datetime.utcnow().isoformat() + 'Z', 'pages': [], 'assets': {}}
+    for page in page_paths():
+        with open(os.path.join(ROOT, page), encoding='utf-8', newline='') as f:
+            html = f.read()
+
+        # Replace runs back to front so earlier offsets stay valid
+        for run in reversed(asset_runs(page, html)):
+            data = bundle_content(run['kind'], run['sources']).encode('utf-8')
+            stem = os.path.basename(run['sources'][0]).rsplit('.', 1)[0] if len(run['sources']) == 1 else 'bundle'
+            name = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}.{run['kind']}"
+
+            # Pages that load the same files share one bundle
+            if name not in manifest['assets']:
+                sizes = write_asset(assets_dir, name, data)
+                manifest['assets'][name] = {'sources': run['sources'], 'sizes': sizes}
+                print(f"📦 {name}: {len(run['sources'])} files, {sizes['raw']} bytes"
+                      f" (gzip {sizes.get('gz', '-')}, brotli {sizes.get('br', '-')})")
+
+            url = ASSET_URL_PREFIX + name
+            if run['kind'] == 'css':
+                tag = f'<link rel="stylesheet" href="{url}">'
+            else:
+                tag = f'<script src="{url}"></script>'
+            html = html[:run['start']] + tag + html[run['end']:]
+
+        output_path = os.path.join(staging_dir, page)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(html)
+        manifest['pages'].append(page)
+
+    with open(os.path.join(staging_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.rename(staging_dir, build_dir)
+    return manifest
+
+if __name__ == '__main__':
+    print("🏗️  Static Asset Build for Disaster Alert System")
+    print("=" * 50)
+
+    try:
+        manifest = build()
+        print(f"\n🎉 Built {len(manifest['pages'])} pages and {len(manifest['assets'])} bundles into {BUILD_DIR}")
+    except Exception as e:
+        print(f"❌ Build failed: {e}")
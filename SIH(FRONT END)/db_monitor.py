@@ -0,0 +1,196 @@
+"""
+MongoDB command monitoring for the Disaster Alert System
+A pymongo CommandListener times every command and groups it by query shape:
+the command, collection and filter/pipeline with every value replaced by
+'?', so find({'status': 'pending'}) and find({'status': 'verified'}) count
+as one shape. Time and call counts are also attributed to the Flask route
+that issued the command, and commands slower than SLOW_QUERY_MS are logged.
+"""
+
+from collections import deque
+from datetime import datetime
+from pymongo import monitoring
+import hashlib
+import json
+import logging
+import os
+import threading
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+SLOW_LOG_SIZE = 100
+SHAPE_TEXT_LIMIT = 500
+
+logger = logging.getLogger('disaster_alert.db')
+
+# Connection handshakes, auth and session bookkeeping are not queries
+IGNORED_COMMANDS = {
+    'hello', 'ismaster', 'ping', 'buildinfo', 'saslstart', 'saslcontinue',
+    'endsessions', 'getnonce', 'authenticate', 'killcursors'
+}
+
+# Where each command keeps the part of its body that decides how it runs
+SHAPE_FIELDS = {
+    'find': ('filter', 'sort', 'projection'),
+    'aggregate': ('pipeline',),
+    'count': ('query',),
+    'distinct': ('key', 'query'),
+    'findAndModify': ('query', 'sort', 'update'),
+    'update': ('updates',),
+    'delete': ('deletes',),
+    'insert': (),
+    'createIndexes': ('indexes',),
+}
+
+def shape_of(value):
+    """Replace values with '?', keeping field names, operators and stage structure"""
+    if isinstance(value, dict):
+        return {key: shape_of(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Lists of documents ($and, pipelines, update batches) keep their structure;
+        # lists of values ($in: [...]) collapse so their length does not matter
+        documents = [shape_of(item) for item in value if isinstance(item, dict)]
+        if documents:
+            unique = []
+            for document in documents:
+                if document not in unique:
+                    unique.append(document)
+            return unique
+        return '?'
+    # '$field' references in pipelines are part of the shape, not data
+    if isinstance(value, str) and value.startswith('$'):
+        return value
+    return '?'
+
+def command_shape(command_name, command):
+    """Return (collection, shape text) for a command document"""
+    collection = command.get(command_name)
+    if not isinstance(collection, str):
+        collection = None
+    fields = SHAPE_FIELDS.get(command_name)
+    if fields is None:
+        return collection, ''
+    body = {field: shape_of(command[field]) for field in fields if field in command}
+    if command_name == 'createIndexes':
+        body = {'indexes': [index.get('key') for index in command.get('indexes', [])]}
+    return collection, json.dumps(body, default=str, separators=(',', ':'))
+
+class CommandMonitor(monitoring.CommandListener):
+    """Per-process command timings by query shape and by originating route.
+
+    route_of() is called in the thread that issued the command and names
+    what issued it (the Flask route, or a background thread).
+    """
+
+    def __init__(self, route_of, slow_ms=SLOW_QUERY_MS):
+        self.route_of = route_of
+        self.slow_ms = slow_ms
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.shapes = {}
+        self.routes = {}
+        self.slow_log = deque(maxlen=SLOW_LOG_SIZE)
+
+    def started(self, event):
+        if event.command_name.lower() in IGNORED_COMMANDS:
+            return
+        try:
+            if event.command_name == 'getMore':
+                collection, shape = event.command.get('collection'), ''
+            else:
+                collection, shape = command_shape(event.command_name, event.command)
+            route = self.route_of()
+        except Exception:
+            return
+        self.pending[(event.connection_id, event.request_id)] = (event.command_name, collection, shape, route)
+
+    def succeeded(self, event):
+        self.record(event, failed=False)
+
+    def failed(self, event):
+        self.record(event, failed=True)
+
+    def record(self, event, failed):
+        started = self.pending.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        command_name, collection, shape, route = started
+        ms = event.duration_micros / 1000
+        fingerprint = hashlib.sha1(f'{command_name}|{collection}|{shape}'.encode('utf-8')).hexdigest()[:12]
+
+        with self.lock:
+            stats = self.shapes.get(fingerprint)
+            if stats is None:
+                stats = self.shapes[fingerprint] = {
+                    'command': command_name,
+                    'collection': collection,
+                    'shape': shape[:SHAPE_TEXT_LIMIT],
+                    'calls': 0,
+                    'failures': 0,
+                    'slow': 0,
+                    'totalMs': 0.0,
+                    'maxMs': 0.0,
+                    'routes': {}
+                }
+            stats['calls'] += 1
+            stats['totalMs'] += ms
+            stats['maxMs'] = max(stats['maxMs'], ms)
+            stats['routes'][route] = stats['routes'].get(route, 0) + 1
+            if failed:
+                stats['failures'] += 1
+
+            route_stats = self.routes.setdefault(route, {'calls': 0, 'totalMs': 0.0})
+            route_stats['calls'] += 1
+            route_stats['totalMs'] += ms
+
+            slow = ms >= self.slow_ms
+            if slow:
+                stats['slow'] += 1
+                self.slow_log.append({
+                    'at': datetime.utcnow().isoformat() + 'Z',
+                    'fingerprint': fingerprint,
+                    'command': command_name,
+                    'collection': collection,
+                    'route': route,
+                    'ms': round(ms, 1),
+                    'failed': failed
+                })
+
+        if slow:
+            logger.warning("Slow %s on %s", command_name, collection, extra={
+                'route': route,
+                'durationMs': round(ms, 1),
+                'fingerprint': fingerprint,
+                'shape': shape[:200],
+                'failed': failed
+            })
+
+    def snapshot(self):
+        """JSON-safe copy of this process's totals"""
+        with self.lock:
+            return {
+                'shapes': {key: dict(stats, routes=dict(stats['routes'])) for key, stats in self.shapes.items()},
+                'routes': {route: dict(stats) for route, stats in self.routes.items()},
+                'slowLog': list(self.slow_log)
+            }
+
+def merge_snapshots(snapshots):
+    """Sum the totals of several processes' snapshots"""
+    shapes, routes, slow_log = {}, {}, []
+    for snapshot in snapshots:
+        for fingerprint, stats in snapshot.get('shapes', {}).items():
+            total = shapes.get(fingerprint)
+            if total is None:
+                shapes[fingerprint] = dict(stats, routes=dict(stats['routes']))
+                continue
+            for field in ('calls', 'failures', 'slow', 'totalMs'):
+                total[field] += stats[field]
+            total['maxMs'] = max(total['maxMs'], stats['maxMs'])
+            for route, calls in stats['routes'].items():
+                total['routes'][route] = total['routes'].get(route, 0) + calls
+        for route, stats in snapshot.get('routes', {}).items():
+            total = routes.setdefault(route, {'calls': 0, 'totalMs': 0.0})
+            total['calls'] += stats['calls']
+            total['totalMs'] += stats['totalMs']
+        slow_log += snapshot.get('slowLog', [])
+    slow_log.sort(key=lambda entry: entry['at'], reverse=True)
+    return {'shapes': shapes, 'routes': routes, 'slowLog': slow_log[:SLOW_LOG_SIZE]}
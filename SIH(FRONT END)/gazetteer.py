@@ -0,0 +1,148 @@
+"""
+Gazetteer for the Disaster Alert System
+Resolves free-text Indian locations to coordinates using the place list in
+data/gazetteer.csv. The file is loaded once into a word-level trie so each
+lookup is a single scan over the location's words.
+"""
+
+import csv
+import hashlib
+import os
+import re
+
+GAZETTEER_PATH = os.environ.get(
+    'GAZETTEER_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv')
+)
+
+# Prefer the most specific place mentioned: "Andheri, Mumbai, Maharashtra" -> Mumbai
+KIND_PRIORITY = {'city': 0, 'district': 1, 'state': 2}
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def tokenize(text):
+    """Split a location string into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def normalize_location(text):
+    """Canonical form of a location string, used as the geocode cache key"""
+    return ' '.join(tokenize(text or ''))
+
+def normalize_coordinates(value):
+    """Convert client coordinates ([lat, lng], {lat, lng} or {latitude, longitude}) to [lat, lng]"""
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        lat, lng = value
+    elif isinstance(value, dict):
+        lat = value.get('lat', value.get('latitude'))
+        lng = value.get('lng', value.get('longitude'))
+    else:
+        return None
+
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return [lat, lng]
+
+def geojson_point(coordinates):
+    """GeoJSON Point for a [lat, lng] pair, as stored for the 2dsphere index (GeoJSON is [lng, lat])"""
+    if not coordinates:
+        return None
+    lat, lng = coordinates
+    return {'type': 'Point', 'coordinates': [lng, lat]}
+
+class Gazetteer:
+    """Word-level trie over place names; each terminal node holds the entries with that name"""
+
+    def __init__(self, entries, version=None):
+        self.trie = {}
+        self.size = 0
+        self.version = version
+        for entry in entries:
+            self.add(entry)
+
+    @classmethod
+    def load(cls, path=GAZETTEER_PATH):
+        """Load the gazetteer from a CSV file with name,state,kind,lat,lng columns"""
+        with open(path, 'rb') as f:
+            # Cached geocodes are tagged with this so edits to the file invalidate them
+            version = hashlib.sha1(f.read()).hexdigest()[:12]
+
+        with open(path, newline='', encoding='utf-8') as f:
+            entries = [
+                {
+                    'name': row['name'],
+                    'state': row['state'],
+                    'kind': row['kind'],
+                    'coordinates': [float(row['lat']), float(row['lng'])]
+                }
+                for row in csv.DictReader(f)
+            ]
+        return cls(entries, version)
+
+    def add(self, entry):
+        """Insert a place entry under its tokenized name, alongside any same-named places"""
+        node = self.trie
+        for token in tokenize(entry['name']):
+            node = node.setdefault(token, {})
+        node.setdefault(None, []).append(entry)
+        self.size += 1
+
+    def find_all(self, location):
+        """Return (position, entries) for the longest place name starting at each word"""
+        tokens = tokenize(location)
+        matches = []
+        for start in range(len(tokens)):
+            node = self.trie
+            longest = None
+            for token in tokens[start:]:
+                node = node.get(token)
+                if node is None:
+                    break
+                if None in node:
+                    longest = node[None]
+            if longest is not None:
+                matches.append((start, longest))
+        return matches
+
+    def lookup(self, location):
+        """Return the best place entry for a location string, or None"""
+        matches = self.find_all(location or '')
+        if not matches:
+            return None
+
+        states = {entry['state'] for _, entries in matches for entry in entries if entry['kind'] == 'state'}
+
+        # A name shared by places in several states ("Aurangabad, Bihar") resolves
+        # to the one in a state the text mentions, by name or through another
+        # unambiguous place; otherwise to the first listed in the file
+        mentioned = states | {entries[0]['state'] for _, entries in matches if len(entries) == 1}
+        candidates = []
+        for position, entries in matches:
+            if len(entries) > 1:
+                entries = [entry for entry in entries if entry['state'] in mentioned] or entries[:1]
+            candidates += [(position, entry) for entry in entries]
+
+        # If the text names a state, discard places in other states
+        if states:
+            consistent = [c for c in candidates if c[1]['state'] in states]
+            candidates = consistent or candidates
+
+        _, entry = min(candidates, key=lambda c: (KIND_PRIORITY.get(c[1]['kind'], len(KIND_PRIORITY)), c[0]))
+        return entry
+
+    def geocode(self, location):
+        """Resolve a location deterministically to {'coordinates', 'source', 'state'}.
+
+        source is 'gazetteer' for a city/district match, 'state-centroid' when
+        only a state is recognised and 'unknown' (with no coordinates) otherwise.
+        """
+        entry = self.lookup(location)
+        if entry is None:
+            return {'coordinates': None, 'source': 'unknown', 'state': None}
+
+        source = 'state-centroid' if entry['kind'] == 'state' else 'gazetteer'
+        return {'coordinates': list(entry['coordinates']), 'source': source, 'state': entry['state']}
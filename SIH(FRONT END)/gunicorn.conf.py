@@ -0,0 +1,75 @@
+"""
+Gunicorn configuration for the Disaster Alert System
+    gunicorn -c gunicorn.conf.py wsgi:app
+Pre-forks WEB_CONCURRENCY worker processes, each serving THREADS_PER_WORKER
+requests at a time. See "Production Deployment" in README.md for tuning.
+"""
+
+import glob
+import multiprocessing
+import os
+import signal
+import tempfile
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+
+# CPU-bound work (JSON encoding, bcrypt, geocoding) scales with processes;
+# MongoDB and SMTP waits overlap within a process on threads
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2))
+worker_class = 'gthread'
+
+# Live map streams belong on the gevent stream server (gunicorn.stream.conf.py).
+# Any that reach this server hold one thread each, so the app caps them at
+# SSE_MAX_STREAMS (default a quarter of this) per worker and further viewers poll
+threads = int(os.environ.get('THREADS_PER_WORKER', '32'))
+
+# Import the app in each worker after fork: PyMongo clients and the outbox
+# threads must not be shared with the master process
+preload_app = False
+
+# Requests get this long to finish after SIGTERM before the worker is killed
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', '30'))
+timeout = int(os.environ.get('WORKER_TIMEOUT', '60'))
+keepalive = int(os.environ.get('KEEPALIVE', '5'))
+
+# Worker recycling drops every live stream's replay log, so it is off unless asked for
+max_requests = int(os.environ.get('MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('ACCESS_LOG', '-')
+errorlog = '-'
+
+# Each worker writes its request metrics here and /api/metrics sums them.
+# Set before the workers start so they all inherit it (see metrics.py)
+METRICS_DIR = os.environ.setdefault(
+    'METRICS_DIR',
+    os.path.join(tempfile.gettempdir(), f'disaster-alert-metrics-{os.getpid()}')
+)
+
+def clear_metrics():
+    for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+        os.remove(path)
+
+def on_starting(server):
+    """Start every run with empty metrics"""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    clear_metrics()
+
+def on_exit(server):
+    clear_metrics()
+    try:
+        os.rmdir(METRICS_DIR)
+    except OSError:
+        pass
+
+def post_worker_init(worker):
+    """Close SSE streams and stop the email outbox as soon as a graceful shutdown starts"""
+    from app import begin_shutdown
+
+    handle_exit = signal.getsignal(signal.SIGTERM)
+
+    def on_sigterm(signum, frame):
+        begin_shutdown()
+        handle_exit(signum, frame)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
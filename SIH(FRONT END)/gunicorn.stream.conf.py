@@ -0,0 +1,42 @@
+"""
+Gunicorn configuration for the live map stream server
+    gunicorn -c gunicorn.stream.conf.py wsgi:app
+Serves /api/live-disasters/stream on gevent workers, where an open stream is
+a greenlet instead of a gthread thread, so one worker holds thousands of map
+viewers. The reverse proxy routes that path here and everything else to the
+API server (gunicorn.conf.py); see "Production Deployment" in README.md.
+Events reach these workers through the live_events collection.
+"""
+
+import importlib.util
+import os
+
+# Shutdown and metrics hooks are the API server's
+spec = importlib.util.spec_from_file_location(
+    'api_gunicorn_conf', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+)
+api_conf = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(api_conf)
+
+bind = os.environ.get('STREAM_BIND', '127.0.0.1:8001')
+
+# Streams mostly wait on their queue; a couple of processes is plenty
+workers = int(os.environ.get('STREAM_WORKERS', '2'))
+worker_class = 'gevent'
+worker_connections = int(os.environ.get('STREAM_CONNECTIONS', '5000'))
+
+# Read by app.py when each worker imports it. Leave some connections for
+# reconnects and the 503 answers past the cap; the API server delivers email
+os.environ.setdefault('SSE_MAX_STREAMS', str(max(1, worker_connections - 100)))
+os.environ.setdefault('EMAIL_WORKERS', '0')
+
+preload_app = False
+graceful_timeout = api_conf.graceful_timeout
+timeout = api_conf.timeout
+keepalive = api_conf.keepalive
+accesslog = api_conf.accesslog
+errorlog = api_conf.errorlog
+
+on_starting = api_conf.on_starting
+on_exit = api_conf.on_exit
+post_worker_init = api_conf.post_worker_init
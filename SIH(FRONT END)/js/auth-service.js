@@ -5,6 +5,7 @@
 const authService = (function() {
     // Constants
     const CURRENT_USER_KEY = 'disaster_current_user';
+    const AUTH_TOKEN_KEY = 'disaster_auth_token';
     const API_BASE = '/api/auth';
     
     // User roles
@@ -22,12 +23,25 @@ const authService = (function() {
         localStorage.setItem(CURRENT_USER_KEY, JSON.stringify(sessionUser));
     }
     
+    // Clear the stored user and token
+    function clearSession() {
+        localStorage.removeItem(CURRENT_USER_KEY);
+        localStorage.removeItem(AUTH_TOKEN_KEY);
+    }
+    
+    // Authorization header for protected API calls (empty when logged out)
+    function authHeaders() {
+        const token = localStorage.getItem(AUTH_TOKEN_KEY);
+        return token ? { 'Authorization': `Bearer ${token}` } : {};
+    }
+    
     // Make API request helper
     function makeApiRequest(url, method = 'GET', data = null) {
         const options = {
             method: method,
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                ...authHeaders()
             }
         };
         
@@ -38,6 +52,10 @@ const authService = (function() {
         return fetch(url, options)
             .then(response => {
                 if (!response.ok) {
+                    // An expired or revoked token ends the session
+                    if (response.status === 401) {
+                        clearSession();
+                    }
                     return response.json().then(err => {
                         throw new Error(err.error || `HTTP ${response.status}`);
                     });
@@ -155,8 +173,9 @@ const authService = (function() {
                             if (response.success) {
                                 console.log("Login successful:", response.user.email);
                                 
-                                // Save current user session
+                                // Save current user session and its signed token
                                 saveCurrentUser(response.user);
+                                localStorage.setItem(AUTH_TOKEN_KEY, response.token);
                                 
                                 resolve(response.user);
                             } else {
@@ -180,13 +199,27 @@ const authService = (function() {
          * @returns {Promise} - Resolves when logout is complete
          */
         logout: function() {
-            return new Promise((resolve) => {
-                localStorage.removeItem(CURRENT_USER_KEY);
+            // Revoke the token on the server; the local session is cleared either way
+            const revoke = localStorage.getItem(AUTH_TOKEN_KEY)
+                ? makeApiRequest(`${API_BASE}/logout`, 'POST').catch(error => {
+                    console.warn("Token revocation failed:", error);
+                })
+                : Promise.resolve();
+            
+            return revoke.then(() => {
+                clearSession();
                 console.log("User logged out");
-                resolve();
             });
         },
         
+        /**
+         * Get headers that authorize a request as the current user
+         * @returns {Object} - Authorization header, or an empty object if not logged in
+         */
+        getAuthHeaders: function() {
+            return authHeaders();
+        },
+        
         /**
          * Get current logged in user
          * @returns {Object|null} - Current user or null if not logged in
@@ -227,7 +227,7 @@ document.addEventListener('DOMContentLoaded', function() {
         confirmationDiv.className = 'admin-confirmation';
         confirmationDiv.innerHTML = `
             <i class="fas fa-envelope"></i>
-            <span>Your message has been sent directly to our admin team at <strong>${adminEmail}</strong></span>
+            <span>Your message has been received and our admin team at <strong>${adminEmail}</strong> will be notified</span>
         `;
         
         const successMessage = document.querySelector('.success-message');
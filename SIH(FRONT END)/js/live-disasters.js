@@ -2,6 +2,24 @@
 let map;
 let disasterMarkers = [];
 let disasters = [];
+let clusterRequest = null;
+let clusterTimer = null;
+let pendingPopupId = null;
+
+// Pushed reports are drawn as their own markers right away; the clusters are
+// re-fetched at most once per CLUSTER_REFRESH_MS (plus jitter so open tabs
+// spread out) instead of once per event
+const CLUSTER_REFRESH_MS = 60 * 1000;
+const LIST_RENDER_MS = 500;
+let liveMarkers = new Map();
+let clusterRefreshTimer = null;
+let listRenderTimer = null;
+
+// When a server worker has no stream slots left it answers 503 and the page
+// polls instead, trying the stream again after STREAM_RETRY_MS
+const POLL_MS = 30 * 1000;
+const STREAM_RETRY_MS = 5 * 60 * 1000;
+let pollTimer = null;
 
 // Initialize the page
 document.addEventListener('DOMContentLoaded', function() {
@@ -19,12 +37,10 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize components with delay for smooth loading
     setTimeout(() => {
         initializeMap();
+        connectLiveFeed();
         loadDisasterData();
         hideMapLoading();
         
-        // Refresh data every 30 seconds
-        setInterval(loadDisasterData, 30000);
-        
         console.log('Live Disasters page initialized with enhanced controls');
     }, 1000);
 });
@@ -58,13 +74,14 @@ function initializeMap() {
     // Add custom controls
     addCustomMapControls();
     
-    // Add map event listeners
+    // Add map event listeners (moveend also fires after a zoom)
     map.on('zoomend', function() {
         updateMapInfo();
     });
     
     map.on('moveend', function() {
         updateMapInfo();
+        updateMap();
     });
     
     console.log('Map initialized successfully with enhanced controls');
@@ -256,6 +273,124 @@ async function loadDisasterData() {
     }
 }
 
+// Subscribe to pushed updates; fall back to polling where EventSource is unavailable
+function connectLiveFeed() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    
+    openLiveStream();
+    
+    // Occasional full reload drops reports that have aged out of the 24 hour window
+    setInterval(loadDisasterData, 5 * 60 * 1000);
+}
+
+function startPolling() {
+    if (!pollTimer) {
+        pollTimer = setInterval(loadDisasterData, POLL_MS);
+    }
+}
+
+function stopPolling() {
+    clearInterval(pollTimer);
+    pollTimer = null;
+}
+
+function openLiveStream() {
+    // The browser reconnects automatically and sends Last-Event-ID,
+    // so the server replays anything missed while disconnected
+    const source = new EventSource('/api/live-disasters/stream');
+    
+    source.onopen = () => {
+        if (pollTimer) {
+            // Catch up on anything since the last poll
+            stopPolling();
+            loadDisasterData();
+        }
+    };
+    
+    source.addEventListener('disaster', event => {
+        upsertDisaster(JSON.parse(event.data));
+    });
+    
+    // Sent when the server cannot replay what we missed
+    source.addEventListener('reset', () => {
+        loadDisasterData();
+    });
+    
+    source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) {
+            // Refused (the server's stream limit); the browser will not retry on its own
+            console.warn('Live feed unavailable, polling instead');
+            startPolling();
+            setTimeout(openLiveStream, STREAM_RETRY_MS);
+            return;
+        }
+        console.warn('Live feed disconnected, reconnecting...');
+    };
+}
+
+// Add a new disaster or replace a changed one without re-fetching the clusters
+function upsertDisaster(disaster) {
+    const index = disasters.findIndex(d => d._id === disaster._id);
+    if (index >= 0) {
+        disasters[index] = disaster;
+    } else {
+        disasters.unshift(disaster);
+    }
+    
+    showPushedDisaster(disaster);
+    scheduleListRender();
+    scheduleClusterRefresh();
+}
+
+// Draw or update a pushed report's marker; the next cluster refresh folds it in
+function showPushedDisaster(disaster) {
+    if (!map || !disaster.coordinates) {
+        return;
+    }
+    
+    const marker = liveMarkers.get(disaster._id) || disasterMarkers.find(m => m.reportId === disaster._id);
+    if (marker) {
+        marker.setIcon(createDisasterIcon(disaster.severity));
+        marker.bindPopup(createPopupContent(disaster));
+        return;
+    }
+    if (!map.getBounds().contains(disaster.coordinates)) {
+        return;
+    }
+    
+    const liveMarker = L.marker(disaster.coordinates, { icon: createDisasterIcon(disaster.severity) })
+        .bindPopup(createPopupContent(disaster))
+        .addTo(map);
+    liveMarker.reportId = disaster._id;
+    liveMarker.addedAt = Date.now();
+    liveMarkers.set(disaster._id, liveMarker);
+}
+
+// A burst of pushed events re-renders the list once
+function scheduleListRender() {
+    if (listRenderTimer) {
+        return;
+    }
+    listRenderTimer = setTimeout(() => {
+        listRenderTimer = null;
+        updateDisastersList();
+        updateDisasterCount();
+    }, LIST_RENDER_MS);
+}
+
+function scheduleClusterRefresh() {
+    if (clusterRefreshTimer) {
+        return;
+    }
+    clusterRefreshTimer = setTimeout(() => {
+        clusterRefreshTimer = null;
+        loadClusters();
+    }, CLUSTER_REFRESH_MS * (1 + Math.random()));
+}
+
 // Update the disasters list
 function updateDisastersList() {
     const disastersList = document.getElementById('disastersList');
@@ -290,52 +425,147 @@ function updateDisastersList() {
     `).join('');
 }
 
-// Update map markers
+// Markers come from the server-side clustering endpoint, so the map shows
+// every active report in view however many there are. Re-render requests
+// are debounced; a newer request aborts the one in flight.
 function updateMap() {
+    clearTimeout(clusterTimer);
+    clusterTimer = setTimeout(loadClusters, 250);
+}
+
+async function loadClusters() {
+    const bounds = map.getBounds();
+    const bbox = [
+        Math.max(bounds.getWest(), -180),
+        Math.max(bounds.getSouth(), -85),
+        Math.min(bounds.getEast(), 180),
+        Math.min(bounds.getNorth(), 85)
+    ].map(value => value.toFixed(5)).join(',');
+    
+    if (clusterRequest) {
+        clusterRequest.abort();
+    }
+    clusterRequest = new AbortController();
+    
+    // This fetch includes every pushed report, so no separate refresh is needed
+    clearTimeout(clusterRefreshTimer);
+    clusterRefreshTimer = null;
+    const requestedAt = Date.now();
+    
+    try {
+        const response = await fetch(`/api/live-disasters/clusters?zoom=${map.getZoom()}&bbox=${bbox}`, {
+            signal: clusterRequest.signal
+        });
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        
+        const result = await response.json();
+        renderClusters(result.clusters, requestedAt);
+    } catch (error) {
+        if (error.name !== 'AbortError') {
+            console.error('Error loading map clusters:', error);
+        }
+    }
+}
+
+function renderClusters(clusters, requestedAt) {
     // Clear existing markers
     disasterMarkers.forEach(marker => {
         map.removeLayer(marker);
     });
     disasterMarkers = [];
     
-    // Add markers for each disaster
-    disasters.forEach(disaster => {
-        if (disaster.coordinates && disaster.coordinates.length === 2) {
-            const [lat, lng] = disaster.coordinates;
-            
-            // Create custom marker based on severity
-            const markerColor = getSeverityColor(disaster.severity);
-            const markerSize = getSeveritySize(disaster.severity);
-            
-            const customIcon = L.divIcon({
-                className: 'custom-disaster-marker',
-                html: `<div style="
-                    background-color: ${markerColor};
-                    width: ${markerSize}px;
-                    height: ${markerSize}px;
-                    border-radius: 50%;
-                    border: 3px solid white;
-                    box-shadow: 0 2px 8px rgba(0,0,0,0.3);
-                    display: flex;
-                    align-items: center;
-                    justify-content: center;
-                    color: white;
-                    font-weight: bold;
-                    font-size: ${Math.max(10, markerSize - 10)}px;
-                ">
-                    <i class="fas fa-exclamation"></i>
-                </div>`,
-                iconSize: [markerSize, markerSize],
-                iconAnchor: [markerSize/2, markerSize/2],
-                popupAnchor: [0, -markerSize/2]
-            });
-            
-            const marker = L.marker([lat, lng], { icon: customIcon })
-                .bindPopup(createPopupContent(disaster))
-                .addTo(map);
-            
-            disasterMarkers.push(marker);
+    // Reports pushed while the request was in flight are not in its clusters yet
+    liveMarkers.forEach((marker, reportId) => {
+        if (marker.addedAt < requestedAt) {
+            map.removeLayer(marker);
+            liveMarkers.delete(reportId);
+        }
+    });
+    
+    clusters.forEach(cluster => {
+        const [lat, lng] = cluster.coordinates;
+        const disaster = cluster.reportId && disasters.find(d => d._id === cluster.reportId);
+        
+        let marker;
+        if (cluster.count > 1) {
+            marker = L.marker([lat, lng], { icon: createClusterIcon(cluster) })
+                .on('click', () => map.setView([lat, lng], Math.min(map.getZoom() + 2, map.getMaxZoom())));
+        } else {
+            const severity = disaster ? disaster.severity : (cluster.maxSeverity || 'unknown');
+            marker = L.marker([lat, lng], { icon: createDisasterIcon(severity) })
+                .bindPopup(disaster ? createPopupContent(disaster) : createClusterPopupContent(cluster));
+            marker.reportId = cluster.reportId;
         }
+        
+        marker.addTo(map);
+        disasterMarkers.push(marker);
+    });
+    
+    if (pendingPopupId) {
+        const marker = disasterMarkers.find(m => m.reportId === pendingPopupId) || liveMarkers.get(pendingPopupId);
+        if (marker) {
+            marker.openPopup();
+        }
+        pendingPopupId = null;
+    }
+}
+
+// Single report marker based on severity
+function createDisasterIcon(severity) {
+    const markerColor = getSeverityColor(severity);
+    const markerSize = getSeveritySize(severity);
+    
+    return L.divIcon({
+        className: 'custom-disaster-marker',
+        html: `<div style="
+            background-color: ${markerColor};
+            width: ${markerSize}px;
+            height: ${markerSize}px;
+            border-radius: 50%;
+            border: 3px solid white;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.3);
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            color: white;
+            font-weight: bold;
+            font-size: ${Math.max(10, markerSize - 10)}px;
+        ">
+            <i class="fas fa-exclamation"></i>
+        </div>`,
+        iconSize: [markerSize, markerSize],
+        iconAnchor: [markerSize/2, markerSize/2],
+        popupAnchor: [0, -markerSize/2]
+    });
+}
+
+// Cluster bubble sized by report count and colored by its most severe report
+function createClusterIcon(cluster) {
+    const markerColor = getSeverityColor(cluster.maxSeverity || 'unknown');
+    const markerSize = Math.min(60, 28 + Math.round(Math.log10(cluster.count) * 12));
+    
+    return L.divIcon({
+        className: 'custom-disaster-marker',
+        html: `<div title="${cluster.count} reports, mostly ${cluster.dominantType}" style="
+            background-color: ${markerColor};
+            width: ${markerSize}px;
+            height: ${markerSize}px;
+            border-radius: 50%;
+            border: 3px solid white;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.3);
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            color: white;
+            font-weight: bold;
+            font-size: 13px;
+        ">
+            ${cluster.count}
+        </div>`,
+        iconSize: [markerSize, markerSize],
+        iconAnchor: [markerSize/2, markerSize/2]
     });
 }
 
@@ -369,6 +599,25 @@ function createPopupContent(disaster) {
     `;
 }
 
+// Popup for a single report that is not in the loaded list
+function createClusterPopupContent(cluster) {
+    return `
+        <div style="min-width: 200px;">
+            <div style="font-weight: bold; color: #2c3e50; margin-bottom: 8px;">
+                <span class="disaster-type disaster-${cluster.dominantType}" style="font-size: 0.8em; padding: 2px 6px; border-radius: 10px;">
+                    ${String(cluster.dominantType).toUpperCase()}
+                </span>
+            </div>
+            ${cluster.maxSeverity ? `<div style="margin-bottom: 8px;">
+                <strong>Severity:</strong> 
+                <span class="severity-${cluster.maxSeverity}" style="padding: 2px 6px; border-radius: 8px; font-size: 0.8em;">
+                    ${cluster.maxSeverity.toUpperCase()}
+                </span>
+            </div>` : ''}
+        </div>
+    `;
+}
+
 // Get marker color based on severity
 function getSeverityColor(severity) {
     switch(severity.toLowerCase()) {
@@ -394,17 +643,11 @@ function focusOnDisaster(disasterId) {
     const disaster = disasters.find(d => d._id === disasterId);
     if (disaster && disaster.coordinates) {
         const [lat, lng] = disaster.coordinates;
-        map.setView([lat, lng], 10);
         
-        // Find and open the corresponding marker popup
-        const marker = disasterMarkers.find(m => {
-            const markerLatLng = m.getLatLng();
-            return Math.abs(markerLatLng.lat - lat) < 0.001 && Math.abs(markerLatLng.lng - lng) < 0.001;
-        });
-        
-        if (marker) {
-            marker.openPopup();
-        }
+        // The popup opens once the clusters for the new view are rendered
+        pendingPopupId = disasterId;
+        map.setView([lat, lng], 10);
+        updateMap();
     }
 }
 
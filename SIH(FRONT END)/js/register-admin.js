@@ -102,7 +102,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     
                     // Set success message
                     if (successMessage) {
-                        successMessage.textContent = 'Your administrator account has been created successfully! You now have full system privileges and can manage all aspects of the disaster alert system.';
+                        successMessage.textContent = 'Your administrator access request has been submitted. An existing administrator must approve it before you can use admin features; log in again once it is approved.';
                     }
                 })
                 .catch(error => {
@@ -143,14 +143,11 @@ document.addEventListener('DOMContentLoaded', function() {
                     console.log('Registration successful:', user);
                     
                     // Show success message and redirect
-                    alert(`Registration successful! Welcome ${user.fullName}!`);
+                    alert(user.requestedRole
+                        ? `Registration successful! Your ${user.requestedRole} access request is pending admin approval.`
+                        : `Registration successful! Welcome ${user.name}!`);
                     
-                    // Redirect to appropriate page
-                    if (currentRegisterType === 'admin') {
-                        window.location.href = '../../index.html';
-                    } else {
-                        window.location.href = 'login.html';
-                    }
+                    window.location.href = 'login.html';
                 })
                 .catch(error => {
                     console.error('Registration error:', error);
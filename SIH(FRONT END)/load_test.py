@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Load tests for the Disaster Alert System
+Seeds the database with generated reports and users through the API, then
+runs scripted scenarios from many client threads, each on its own keep-alive
+connection, and reports throughput and latency percentiles per scenario.
+Results are saved as JSON tagged with the git commit; pass an earlier file to
+--compare to see what changed.
+
+By default the app is started in this process against a scratch database on
+a local mongod (the database name must contain 'loadtest'; it is dropped
+first). --stand-in uses an in-memory mongomock database instead (pip install
+mongomock), and --url targets a server that is already running.
+"""
+
+from collections import Counter
+from datetime import datetime
+from gazetteer import GAZETTEER_PATH
+from pymongo import MongoClient, uri_parser
+import argparse
+import csv
+import http.client
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(ROOT, 'loadtest-results')
+DEFAULT_MONGO_URI = 'mongodb://localhost:27017/disaster_alert_loadtest'
+REQUEST_TIMEOUT = 30
+
+SEED_PASSWORD = 'loadtest-password'
+SEED_BATCH_SIZE = 1000
+SEED_THREADS = 8
+PAGE_SIZE = 50
+PERCENTILES = (50, 90, 95, 99)
+
+DISASTER_TYPES = ['earthquake', 'flood', 'fire', 'cyclone', 'landslide', 'other']
+DESCRIPTION_WORDS = [
+    'water', 'road', 'blocked', 'houses', 'river', 'rising', 'people', 'stranded', 'near', 'market',
+    'power', 'lines', 'down', 'bridge', 'collapsed', 'rain', 'heavy', 'village', 'school', 'shelter',
+    'major', 'severe', 'evacuation', 'damage', 'injured', 'affected', 'moderate', 'minor'
+]
+# Share of generated reports that carry GPS coordinates; the rest are geocoded
+GPS_SHARE = 0.7
+
+class HttpClient:
+    """One keep-alive connection that records (seconds, status, bytes) for every request"""
+
+    def __init__(self, base_url):
+        parts = urllib.parse.urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.connection = None
+        self.recording = True
+        self.samples = []
+
+    def request(self, method, path, body=None, headers=None):
+        """Return (status, body bytes); status 0 means the connection failed"""
+        headers = dict(headers or {})
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = self.connection_class(self.netloc, timeout=REQUEST_TIMEOUT)
+            self.connection.request(method, self.prefix + path, body, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+            if response.will_close:
+                self.close()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            status, data = 0, b''
+
+        if self.recording:
+            self.samples.append((time.perf_counter() - start, status, len(data)))
+        return status, data
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+class VirtualUser:
+    """A client thread's connection, random generator and scenario state"""
+
+    def __init__(self, client, rng, seeded):
+        self.client = client
+        self.rng = rng
+        self.seeded = seeded
+        self.state = {}
+
+def load_places():
+    """(location text, [lat, lng]) for every city in the gazetteer"""
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as f:
+        return [
+            (f"{row['name'].title()}, {row['state']}", [float(row['lat']), float(row['lng'])])
+            for row in csv.DictReader(f) if row['kind'] == 'city'
+        ]
+
+PLACES = load_places()
+
+def generate_report(rng):
+    """A report as the submission form would send it"""
+    location, (lat, lng) = rng.choice(PLACES)
+    report = {
+        'name': f'Load Test {rng.randint(1, 999999)}',
+        'location': location,
+        'disasterType': rng.choice(DISASTER_TYPES),
+        'description': ' '.join(rng.choices(DESCRIPTION_WORDS, k=12)),
+        'severity': rng.choice(['low', 'medium', 'high'])
+    }
+    if rng.random() < GPS_SHARE:
+        report['coordinates'] = [round(lat + rng.uniform(-0.2, 0.2), 5), round(lng + rng.uniform(-0.2, 0.2), 5)]
+    return report
+
+def seed_emails(count):
+    return [f'loadtest-{i}@example.com' for i in range(count)]
+
+def json_body(status, data):
+    if status != 200:
+        return {}
+    try:
+        return json.loads(data)
+    except ValueError:
+        return {}
+
+# Scenarios: each call makes one request for one virtual user
+
+def map_pollers(user):
+    """Live map clients polling for the last 24 hours of reports"""
+    user.client.request('GET', '/api/live-disasters')
+
+def stats_refresh(user):
+    """Dashboards refreshing the counters"""
+    user.client.request('GET', '/api/stats')
+
+def deep_pagination(user):
+    """Walk the whole report list with ?after= cursors, starting over at the end"""
+    cursor = user.state.get('cursor', '')
+    status, data = user.client.request(
+        'GET', f'/api/reports?view=list&limit={PAGE_SIZE}&after={urllib.parse.quote(cursor)}'
+    )
+    user.state['cursor'] = json_body(status, data).get('nextCursor') or ''
+
+def deep_offset(user):
+    """Older clients asking for pages in the back half of the list with ?page="""
+    pages = max(math.ceil(user.seeded['reports'] / PAGE_SIZE), 1)
+    page = user.rng.randint(pages // 2 + 1, pages)
+    user.client.request('GET', f'/api/reports?view=list&limit={PAGE_SIZE}&page={page}')
+
+def login_storm(user):
+    """Seeded users all logging in at once (bcrypt bound)"""
+    email = user.rng.choice(user.seeded['emails'])
+    user.client.request('POST', '/api/auth/login', {'email': email, 'password': SEED_PASSWORD})
+
+def submit_surge(user):
+    """A burst of new report submissions"""
+    user.client.request('POST', '/api/reports', generate_report(user.rng))
+
+# Run in this order; the write-heavy surge goes last so reads see the seeded volume
+SCENARIOS = {
+    'map_pollers': (map_pollers, 32),
+    'stats_refresh': (stats_refresh, 16),
+    'deep_pagination': (deep_pagination, 8),
+    'deep_offset': (deep_offset, 8),
+    'login_storm': (login_storm, 16),
+    'submit_surge': (submit_surge, 16),
+}
+
+def start_local_server(mongo_uri, stand_in):
+    """Start the app on a scratch database in a background thread; returns (server, base URL)"""
+    if stand_in:
+        try:
+            import mongomock
+        except ImportError:
+            raise RuntimeError('--stand-in needs mongomock (pip install mongomock)')
+        import flask_pymongo
+        flask_pymongo.MongoClient = mongomock.MongoClient
+    else:
+        database = uri_parser.parse_uri(mongo_uri)['database']
+        if not database or 'loadtest' not in database:
+            raise RuntimeError(f"Refusing to drop '{database}': use a database whose name contains 'loadtest'")
+        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
+        client.drop_database(database)
+        client.close()
+
+    # The app reads these at import
+    os.environ['MONGO_URI'] = mongo_uri
+    os.environ.setdefault('LOG_LEVEL', 'ERROR')
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    from app import create_app
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, name='loadtest-server', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+def seed_data(base_url, report_count, user_count, seed):
+    """Create reports through /api/reports/bulk and users through /api/auth/register"""
+    rng = random.Random(seed)
+    client = HttpClient(base_url)
+    client.recording = False
+    started = time.perf_counter()
+
+    status, data = client.request('GET', '/api/stats')
+    existing = json_body(status, data).get('stats', {}).get('reports', {}).get('total', 0)
+    if existing:
+        print(f"⚠️  The database already has {existing} reports; results are only comparable on the same data")
+
+    inserted = 0
+    for start in range(0, report_count, SEED_BATCH_SIZE):
+        lines = [json.dumps(generate_report(rng)) for _ in range(min(SEED_BATCH_SIZE, report_count - start))]
+        status, data = client.request(
+            'POST', '/api/reports/bulk', '\n'.join(lines).encode('utf-8'),
+            {'Content-Type': 'application/x-ndjson'}
+        )
+        if status != 200:
+            raise RuntimeError(f'Seeding reports failed with HTTP {status}')
+        inserted += json.loads(data.splitlines()[-1])['summary']['inserted']
+
+    # Registration hashes every password, so it runs on several connections;
+    # users left over from an earlier run (409) have the same password
+    emails = seed_emails(user_count)
+    failures = []
+
+    def register(chunk):
+        register_client = HttpClient(base_url)
+        register_client.recording = False
+        for email in chunk:
+            status, _ = register_client.request('POST', '/api/auth/register', {
+                'fullName': 'Load Test User',
+                'email': email,
+                'password': SEED_PASSWORD
+            })
+            if status not in (200, 409):
+                failures.append(status)
+        register_client.close()
+
+    threads = [
+        threading.Thread(target=register, args=(emails[i::SEED_THREADS],))
+        for i in range(SEED_THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if failures:
+        raise RuntimeError(f'Registering {len(failures)} users failed (HTTP {sorted(set(failures))})')
+
+    status, data = client.request('GET', '/api/stats')
+    total = json_body(status, data).get('stats', {}).get('reports', {}).get('total', existing + inserted)
+    client.close()
+    return {
+        'reports': total,
+        'insertedReports': inserted,
+        'users': user_count,
+        'emails': emails,
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list"""
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+def summarize(samples, elapsed, concurrency):
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    statuses = Counter(str(sample[1]) for sample in samples)
+    summary = {
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 2),
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample[1] == 0 or sample[1] >= 400),
+        'statuses': dict(sorted(statuses.items())),
+        'throughput': round(len(samples) / elapsed, 1) if elapsed else 0,
+        'bytes': sum(sample[2] for sample in samples),
+        'latencyMs': {}
+    }
+    if latencies:
+        summary['latencyMs'] = {
+            'mean': round(sum(latencies) / len(latencies), 2),
+            **{f'p{p}': round(percentile(latencies, p), 2) for p in PERCENTILES},
+            'max': round(latencies[-1], 2)
+        }
+    return summary
+
+def run_scenario(base_url, name, concurrency, duration, warmup, seeded, seed):
+    """Drive one scenario from concurrency threads; requests during the warmup are not counted"""
+    step, _ = SCENARIOS[name]
+    users = [
+        VirtualUser(HttpClient(base_url), random.Random(f'{seed}-{name}-{i}'), seeded)
+        for i in range(concurrency)
+    ]
+    measure_start = time.perf_counter() + warmup
+    end = measure_start + duration
+
+    def drive(user):
+        while True:
+            now = time.perf_counter()
+            if now >= end:
+                break
+            user.client.recording = now >= measure_start
+            step(user)
+        user.client.close()
+
+    threads = [threading.Thread(target=drive, args=(user,), name=f'{name}-{i}') for i, user in enumerate(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    samples = [sample for user in users for sample in user.client.samples]
+    return summarize(samples, time.perf_counter() - measure_start, concurrency)
+
+def git_commit():
+    """Short commit hash of the tree under test, '-dirty' if it has uncommitted changes"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        changes = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no', '--', '.'],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f'{commit}-dirty' if changes else commit
+
+def print_comparison(previous, current):
+    """Throughput and p95 change per scenario against an earlier results file"""
+    print(f"\n📊 Compared with {previous.get('commit')} ({previous.get('startedAt')})")
+    if previous.get('seed', {}).get('reports') != current['seed']['reports']:
+        print(f"⚠️  Seeded volumes differ ({previous.get('seed', {}).get('reports')} vs {current['seed']['reports']} reports)")
+    for name, result in current['scenarios'].items():
+        before = previous.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        changes = []
+        for label, old, new in (
+            ('req/s', before['throughput'], result['throughput']),
+            ('p95', before['latencyMs'].get('p95'), result['latencyMs'].get('p95'))
+        ):
+            if old and new is not None:
+                changes.append(f"{label} {old} -> {new} ({(new - old) / old * 100:+.1f}%)")
+        print(f"   {name}: {', '.join(changes)}")
+
+def load_test(args):
+    selected = [name.strip() for name in args.scenarios.split(',') if name.strip()] if args.scenarios else list(SCENARIOS)
+    unknown = sorted(set(selected) - set(SCENARIOS))
+    if unknown:
+        raise RuntimeError(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+
+    server = None
+    if args.url:
+        base_url, target = args.url, {'mode': 'url', 'url': args.url}
+    else:
+        server, base_url = start_local_server(args.mongo_uri, args.stand_in)
+        target = {'mode': 'stand-in' if args.stand_in else 'mongod', 'mongoUri': args.mongo_uri}
+    print(f"🎯 Target: {base_url} ({target['mode']})")
+
+    try:
+        if args.no_seed:
+            seeded = {'reports': args.reports, 'users': args.users, 'emails': seed_emails(args.users), 'seconds': 0}
+        else:
+            print(f"🌱 Seeding {args.reports} reports and {args.users} users...")
+            seeded = seed_data(base_url, args.reports, args.users, args.seed)
+            print(f"✅ Seeded in {seeded['seconds']} s ({seeded['reports']} reports in the database)")
+
+        results = {
+            'startedAt': datetime.utcnow().isoformat() + 'Z',
+            'commit': git_commit(),
+            'target': target,
+            'seed': {key: value for key, value in seeded.items() if key != 'emails'},
+            'settings': {'duration': args.duration, 'warmup': args.warmup, 'randomSeed': args.seed},
+            'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+            'scenarios': {}
+        }
+
+        for name in selected:
+            concurrency = args.concurrency or SCENARIOS[name][1]
+            print(f"\n🏃 {name}: {concurrency} clients for {args.duration} s")
+            result = run_scenario(base_url, name, concurrency, args.duration, args.warmup, seeded, args.seed)
+            results['scenarios'][name] = result
+            latency = result['latencyMs']
+            print(f"{'⚠️ ' if result['errors'] else '✅'} {result['requests']} requests, "
+                  f"{result['throughput']} req/s, {result['errors']} errors")
+            if latency:
+                print(f"   p50 {latency['p50']} ms, p95 {latency['p95']} ms, p99 {latency['p99']} ms, max {latency['max']} ms")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}-{results['commit'] or 'nogit'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print_comparison(json.load(f), results)
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the report and live map APIs')
+    parser.add_argument('--url', help='test a running server instead of starting one in this process')
+    parser.add_argument('--mongo-uri', default=DEFAULT_MONGO_URI, help='scratch database for the in-process server (dropped first)')
+    parser.add_argument('--stand-in', action='store_true', help='run the in-process server on an in-memory mongomock database')
+    parser.add_argument('--reports', type=int, default=5000, help='reports to seed (default 5000)')
+    parser.add_argument('--users', type=int, default=50, help='users to seed for the login storm (default 50)')
+    parser.add_argument('--no-seed', action='store_true', help='use data seeded by an earlier run with the same --reports/--users')
+    parser.add_argument('--scenarios', help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--duration', type=float, default=15, help='measured seconds per scenario (default 15)')
+    parser.add_argument('--warmup', type=float, default=2, help='unmeasured seconds before each scenario (default 2)')
+    parser.add_argument('--concurrency', type=int, help='client threads for every scenario (default: per scenario)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for generated data (default 1)')
+    parser.add_argument('--output', help='results file (default loadtest-results/<time>-<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    print("🏋️  Load Test for Disaster Alert System")
+    print("=" * 50)
+
+    try:
+        load_test(args)
+    except Exception as e:
+        print(f"❌ Load test failed: {e}")
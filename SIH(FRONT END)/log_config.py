@@ -0,0 +1,165 @@
+"""
+Structured logging for the Disaster Alert System
+Log calls only put the record on a bounded queue (QueueHandler); a
+QueueListener thread formats and writes it, so request threads never wait on
+stdout. Records are JSON lines that carry the request id, route and time
+since the request started. Info records logged with extra={'sampled': True}
+are kept at LOG_SAMPLE_RATE.
+"""
+
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+
+LOGGER_NAME = 'disaster_alert'
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# Per-logger overrides, e.g. "disaster_alert.db=WARNING,disaster_alert.email=DEBUG"
+LOG_LEVELS = os.environ.get('LOG_LEVELS', '')
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # 'json' or 'text'
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '0.1'))
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+DROP_REPORT_SECONDS = 10
+
+# Everything else on a record is an extra field and goes into the JSON
+STANDARD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'sampled'}
+
+class SamplingFilter(logging.Filter):
+    """Keep LOG_SAMPLE_RATE of the info records marked sampled; everything else passes"""
+
+    def filter(self, record):
+        if getattr(record, 'sampled', False) and record.levelno <= logging.INFO:
+            return random.random() < LOG_SAMPLE_RATE
+        return True
+
+class ContextFilter(logging.Filter):
+    """Add the fields returned by context() (request id, route, ...) in the thread that logs"""
+
+    def __init__(self, context):
+        super().__init__()
+        self.context = context
+
+    def filter(self, record):
+        for key, value in (self.context() or {}).items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Drops records instead of blocking when the writer falls behind, and says so later"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.last_report = 0.0
+
+    def prepare(self, record):
+        # Keep the traceback as its own field instead of folding it into the message
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped and time.monotonic() - self.last_report >= DROP_REPORT_SECONDS:
+            dropped, self.dropped = self.dropped, 0
+            self.last_report = time.monotonic()
+            warning = logging.makeLogRecord({
+                'name': LOGGER_NAME,
+                'levelno': logging.WARNING,
+                'levelname': 'WARNING',
+                'msg': f'{dropped} log records dropped, log queue full'
+            })
+            try:
+                self.queue.put_nowait(warning)
+            except queue.Full:
+                self.dropped += dropped
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in STANDARD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """One readable line per record, extra fields as key=value (for local development)"""
+
+    def format(self, record):
+        extras = ' '.join(
+            f'{key}={value}' for key, value in record.__dict__.items() if key not in STANDARD_ATTRIBUTES
+        )
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.getMessage()}"
+        if extras:
+            line += f'  [{extras}]'
+        if record.exc_text:
+            line += '\n' + record.exc_text
+        return line
+
+listener = None
+listener_pid = None
+
+def setup_logging(context=None):
+    """Send the app's loggers through a queue to a background writer thread.
+
+    Safe to call again; it only rebuilds the queue in a new (forked) process.
+    """
+    global listener, listener_pid
+    if listener_pid == os.getpid():
+        return listener
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter())
+    if context is not None:
+        handler.addFilter(ContextFilter(context))
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else TextFormatter())
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers[:] = [handler]
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+    for entry in filter(None, (part.strip() for part in LOG_LEVELS.split(','))):
+        name, _, level = entry.partition('=')
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    listener_pid = os.getpid()
+    atexit.register(stop_logging)
+    return listener
+
+def stop_logging():
+    """Write out the queued records and stop this process's writer thread"""
+    global listener, listener_pid
+    if listener is not None and listener_pid == os.getpid():
+        listener.stop()
+    listener = listener_pid = None
@@ -0,0 +1,302 @@
+"""
+Request metrics for the Disaster Alert System
+MetricsMiddleware times every request and records latency and response size
+histograms per route plus in-flight counts. Each thread only writes its own
+counters, so recording a request takes no lock. A background thread writes
+the process's totals to METRICS_DIR (set by gunicorn.conf.py) and
+/api/metrics sums the files of every worker in Prometheus text format.
+"""
+
+import bisect
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '5'))
+
+logger = logging.getLogger('disaster_alert.metrics')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Label values are bounded: unknown methods and unrouted paths are grouped
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+UNMATCHED_ROUTE = 'unmatched'
+ROUTE_ENVIRON_KEY = 'metrics.route'
+
+def observe(series, key, buckets, value):
+    """Add value to a histogram row: one count per bucket, then +Inf, then the sum"""
+    row = series.get(key)
+    if row is None:
+        row = series[key] = [0] * (len(buckets) + 2)
+    row[bisect.bisect_left(buckets, value)] += 1
+    row[-1] += value
+
+def add_rows(total, series):
+    for key, row in list(series.items()):
+        current = total.get(key)
+        total[key] = list(row) if current is None else [a + b for a, b in zip(current, row)]
+
+def process_alive(pid):
+    if pid == os.getpid() or os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class ThreadMetrics:
+    """Counters owned by one thread; only that thread writes them"""
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.latency = {}
+        self.sizes = {}
+        self.in_flight = {}
+
+class RequestMetrics:
+    """Per-process request metrics, written to METRICS_DIR for cross-process totals"""
+
+    def __init__(self, metrics_dir=METRICS_DIR):
+        self.metrics_dir = metrics_dir
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.threads = []
+        self.retired = ThreadMetrics(None)
+        self.sources = {}
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def add_source(self, name, snapshot):
+        """Include snapshot() (JSON-safe) under name in every worker's metrics file"""
+        self.sources[name] = snapshot
+
+    def current(self):
+        metrics = getattr(self.local, 'metrics', None)
+        if metrics is None:
+            metrics = self.local.metrics = ThreadMetrics(threading.current_thread())
+            with self.lock:
+                self.threads.append(metrics)
+        return metrics
+
+    def started(self, environ, route):
+        """Mark a routed request as in flight (called once the URL rule is known)"""
+        if route is None:
+            return
+        environ[ROUTE_ENVIRON_KEY] = route
+        in_flight = self.current().in_flight
+        in_flight[route] = in_flight.get(route, 0) + 1
+
+    def finished(self, environ, status, duration, size):
+        metrics = self.current()
+        route = environ.get(ROUTE_ENVIRON_KEY)
+        if route is None:
+            route = UNMATCHED_ROUTE
+        else:
+            metrics.in_flight[route] = metrics.in_flight.get(route, 0) - 1
+
+        method = environ.get('REQUEST_METHOD', '')
+        if method not in METHODS:
+            method = 'other'
+        observe(metrics.latency, (route, method, status), LATENCY_BUCKETS, duration)
+        if size is not None:
+            observe(metrics.sizes, (route, method), SIZE_BUCKETS, size)
+
+    def snapshot(self):
+        """This process's totals; counters of finished threads are folded into one"""
+        with self.lock:
+            live = []
+            for metrics in self.threads:
+                if metrics.thread.is_alive():
+                    live.append(metrics)
+                else:
+                    add_rows(self.retired.latency, metrics.latency)
+                    add_rows(self.retired.sizes, metrics.sizes)
+                    for route, count in metrics.in_flight.items():
+                        self.retired.in_flight[route] = self.retired.in_flight.get(route, 0) + count
+            self.threads = live
+
+            latency, sizes, in_flight = {}, {}, {}
+            for metrics in [self.retired] + live:
+                add_rows(latency, metrics.latency)
+                add_rows(sizes, metrics.sizes)
+                for route, count in list(metrics.in_flight.items()):
+                    in_flight[route] = in_flight.get(route, 0) + count
+
+        snapshot = {
+            'pid': os.getpid(),
+            'latency': [list(key) + [row] for key, row in latency.items()],
+            'sizes': [list(key) + [row] for key, row in sizes.items()],
+            'inFlight': in_flight
+        }
+        for name, source in self.sources.items():
+            snapshot[name] = source()
+        return snapshot
+
+    def write(self):
+        """Write this process's snapshot to METRICS_DIR (atomically, via rename)"""
+        if not self.metrics_dir:
+            return self.snapshot()
+        snapshot = self.snapshot()
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.metrics_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, os.path.join(self.metrics_dir, f"{snapshot['pid']}.json"))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return snapshot
+
+    def collect(self):
+        """Snapshots of every worker; exited workers still count, but not as in flight"""
+        own = self.write()
+        if not self.metrics_dir:
+            return [own]
+
+        snapshots = [own]
+        for path in glob.glob(os.path.join(self.metrics_dir, '*.json')):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot.get('pid') == own['pid']:
+                continue
+            if not process_alive(snapshot.get('pid')):
+                snapshot['inFlight'] = {}
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render(self):
+        """Prometheus text exposition of the summed snapshots"""
+        latency, sizes, in_flight = {}, {}, {}
+        snapshots = self.collect()
+        for snapshot in snapshots:
+            add_rows(latency, {tuple(entry[:-1]): entry[-1] for entry in snapshot['latency']})
+            add_rows(sizes, {tuple(entry[:-1]): entry[-1] for entry in snapshot['sizes']})
+            for route, count in snapshot['inFlight'].items():
+                in_flight[route] = in_flight.get(route, 0) + count
+
+        lines = []
+        lines += histogram_lines(
+            'http_request_duration_seconds', 'Request latency by route, method and status',
+            ('route', 'method', 'status'), LATENCY_BUCKETS, latency
+        )
+        lines += histogram_lines(
+            'http_response_size_bytes', 'Response body size by route and method',
+            ('route', 'method'), SIZE_BUCKETS, sizes
+        )
+        lines.append('# HELP http_requests_in_flight Requests currently being served, by route')
+        lines.append('# TYPE http_requests_in_flight gauge')
+        for route, count in sorted(in_flight.items()):
+            lines.append(f'http_requests_in_flight{{{label_text(("route",), (route,))}}} {count}')
+        lines.append('# HELP http_metrics_processes Worker processes whose metrics are included')
+        lines.append('# TYPE http_metrics_processes gauge')
+        lines.append(f'http_metrics_processes {len(snapshots)}')
+        return '\n'.join(lines) + '\n'
+
+    def run(self):
+        while not self.stopped.wait(METRICS_FLUSH_SECONDS):
+            try:
+                self.write()
+            except Exception:
+                logger.exception("Metrics flush failed")
+        self.write()
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name='metrics-writer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the writer thread after writing the final totals"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=10)
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def label_text(names, values):
+    return ','.join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+
+def histogram_lines(name, help_text, label_names, buckets, series):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for key, row in sorted(series.items()):
+        labels = label_text(label_names, key)
+        cumulative = 0
+        for bound, count in zip(list(buckets) + ['+Inf'], row[:-1]):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {row[-1]}')
+        lines.append(f'{name}_count{{{labels}}} {cumulative}')
+    return lines
+
+class CountingBody:
+    """Wraps a streamed response body to measure its size and record when it closes"""
+
+    def __init__(self, body, on_close):
+        self.body = body
+        self.on_close = on_close
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            close = getattr(self.body, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self.on_close(self.size)
+
+class MetricsMiddleware:
+    """WSGI middleware that records each request's latency, status and response size.
+
+    Responses with a Content-Length are recorded as soon as the app returns
+    (the body is passed through untouched, keeping sendfile); streamed
+    responses are recorded when the server closes them.
+    """
+
+    def __init__(self, wsgi_app, metrics):
+        self.wsgi_app = wsgi_app
+        self.metrics = metrics
+
+    def __call__(self, environ, start_response):
+        start = time.perf_counter()
+        response = {}
+
+        def capture(status, headers, exc_info=None):
+            response['status'] = status.split(' ', 1)[0]
+            response['length'] = next((value for name, value in headers if name.lower() == 'content-length'), None)
+            return start_response(status, headers, exc_info)
+
+        try:
+            body = self.wsgi_app(environ, capture)
+        except Exception:
+            self.metrics.finished(environ, '500', time.perf_counter() - start, None)
+            raise
+
+        if response.get('length') is not None:
+            self.metrics.finished(environ, response['status'], time.perf_counter() - start, int(response['length']))
+            return body
+
+        def on_close(size):
+            self.metrics.finished(environ, response.get('status', '500'), time.perf_counter() - start, size)
+        return CountingBody(body, on_close)
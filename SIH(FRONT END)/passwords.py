@@ -0,0 +1,175 @@
+"""
+Password hashing for the Disaster Alert System
+bcrypt is deliberately slow, so hashing and checking run in a small pool of
+worker processes instead of request threads. The pool has a fixed queue
+limit: when it is full, callers get PasswordPoolBusy immediately (the API
+answers 503) instead of piling up behind a burst of logins.
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import bcrypt
+
+# Work factor for new hashes; existing hashes with another cost are
+# upgraded on the next successful login
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+
+PASSWORD_WORKERS = int(os.environ.get('PASSWORD_WORKERS', '2'))
+# Hashes running or waiting per server process before new ones are rejected
+PASSWORD_QUEUE_LIMIT = int(os.environ.get('PASSWORD_QUEUE_LIMIT', str(PASSWORD_WORKERS * 8)))
+PASSWORD_TIMEOUT_SECONDS = float(os.environ.get('PASSWORD_TIMEOUT_SECONDS', '10'))
+
+class PasswordPoolBusy(RuntimeError):
+    """Raised when too much password work is already queued"""
+
+def hash_in_worker(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
+
+def check_in_worker(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed)
+
+start_barrier = None
+
+def init_worker(barrier):
+    global start_barrier
+    start_barrier = barrier
+
+def wait_for_pool():
+    """Warm-up task: holds its worker until every worker has one, so each gets started"""
+    try:
+        start_barrier.wait(timeout=PASSWORD_TIMEOUT_SECONDS)
+    except threading.BrokenBarrierError:
+        pass
+
+def pool_context():
+    """forkserver with only this module preloaded where available, else spawn (Windows)"""
+    # Never fork: the server process has MongoDB and SMTP threads
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+@contextmanager
+def main_module_hidden():
+    """Keep pool workers started inside this block from re-running the server's main script.
+
+    spawn and forkserver children import the parent's __main__ (all of app.py
+    under `python app.py`) before taking work; the pool only needs this module.
+    """
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+class PasswordPool:
+    """Bounded process pool, created on first use in each server process"""
+
+    def __init__(self, workers=PASSWORD_WORKERS, queue_limit=PASSWORD_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+        self.slots = threading.BoundedSemaphore(queue_limit)
+
+    def start_executor(self):
+        """Create the executor and start all of its workers now, with __main__ hidden"""
+        context = pool_context()
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(context.Barrier(self.workers),)
+        )
+        # ProcessPoolExecutor starts a worker in submit() while none is idle;
+        # the warm-up tasks block until all are running, so each submit starts one
+        with main_module_hidden():
+            for _ in range(self.workers):
+                executor.submit(wait_for_pool)
+        return executor
+
+    def get_executor(self):
+        with self.lock:
+            # A pool inherited through fork belongs to the parent; start a new one
+            if self.pid != os.getpid():
+                self.executor = None
+                self.pid = os.getpid()
+                self.slots = threading.BoundedSemaphore(self.queue_limit)
+            if self.executor is None:
+                self.executor = self.start_executor()
+            return self.executor
+
+    def discard(self, executor):
+        """Drop a broken executor (a worker was killed) so the next call starts a new one"""
+        with self.lock:
+            if self.executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+    def run(self, fn, *args):
+        """Run fn(*args) in the pool and wait for the result, rebuilding a broken pool once"""
+        try:
+            return self.attempt(fn, *args)
+        except BrokenProcessPool:
+            pass
+        try:
+            return self.attempt(fn, *args)
+        except BrokenProcessPool:
+            raise PasswordPoolBusy('Password workers are restarting')
+
+    def attempt(self, fn, *args):
+        executor = self.get_executor()
+        slots = self.slots
+        if not slots.acquire(blocking=False):
+            raise PasswordPoolBusy('Password queue is full')
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            slots.release()
+            self.discard(executor)
+            raise
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=PASSWORD_TIMEOUT_SECONDS)
+        except TimeoutError:
+            future.cancel()
+            raise PasswordPoolBusy('Password check timed out')
+        except BrokenProcessPool:
+            self.discard(executor)
+            raise
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None and self.pid == os.getpid():
+                self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+pool = PasswordPool()
+
+def hash_password(password):
+    """Hash password using bcrypt at BCRYPT_ROUNDS"""
+    return pool.run(hash_in_worker, password, BCRYPT_ROUNDS)
+
+def check_password(password, hashed):
+    """Check password against hash"""
+    return pool.run(check_in_worker, password, bytes(hashed))
+
+def needs_rehash(hashed):
+    """True if a stored hash was made with a different work factor"""
+    try:
+        return int(bytes(hashed).split(b'$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
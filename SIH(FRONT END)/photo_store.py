@@ -0,0 +1,137 @@
+"""
+Content-addressed photo storage for the Disaster Alert System
+Report photos arrive as base64 data URLs. They are decoded once, written to
+disk under their SHA-256 hash (so identical uploads are stored once) and the
+report keeps only a small reference.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+
+PHOTO_STORE_DIR = os.environ.get(
+    'PHOTO_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads', 'photos')
+)
+MAX_PHOTO_BYTES = int(os.environ.get('MAX_PHOTO_BYTES', str(10 * 1024 * 1024)))
+
+PHOTO_HASH_PATTERN = re.compile(r'[0-9a-f]{64}')
+DATA_URL_PATTERN = re.compile(r'data:([\w/+.-]*)(;[\w=.-]+)*?;base64,(.*)', re.DOTALL)
+
+# Only images are accepted; the type is sniffed from the bytes, not the data URL
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+class PhotoError(ValueError):
+    """Raised for photo data that cannot be stored"""
+
+def sniff_content_type(data):
+    """Return the image MIME type for the given bytes, or None if not a supported image"""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+def decode_data_url(value):
+    """Decode a base64 data URL into bytes"""
+    match = DATA_URL_PATTERN.fullmatch(value.strip())
+    if not match:
+        raise PhotoError('Photo must be a base64 data URL')
+    try:
+        return base64.b64decode(match.group(3), validate=True)
+    except (binascii.Error, ValueError):
+        raise PhotoError('Photo data is not valid base64')
+
+class PhotoStore:
+    """Stores blobs at <root>/<hash[:2]>/<hash[2:4]>/<hash>"""
+
+    def __init__(self, root=PHOTO_STORE_DIR):
+        self.root = root
+
+    def path_for(self, photo_hash):
+        return os.path.join(self.root, photo_hash[:2], photo_hash[2:4], photo_hash)
+
+    def exists(self, photo_hash):
+        return os.path.exists(self.path_for(photo_hash))
+
+    def save(self, data, created=None):
+        """Store image bytes and return a photo reference for the report document.
+
+        The hash is appended to created if this call wrote the blob.
+        """
+        if len(data) > MAX_PHOTO_BYTES:
+            raise PhotoError(f'Photo exceeds the {MAX_PHOTO_BYTES // (1024 * 1024)} MB limit')
+        content_type = sniff_content_type(data)
+        if content_type is None:
+            raise PhotoError('Photo must be a JPEG, PNG, GIF or WebP image')
+
+        photo_hash = hashlib.sha256(data).hexdigest()
+        path = self.path_for(photo_hash)
+        if not os.path.exists(path):
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial blob
+            fd, temp_path = tempfile.mkstemp(dir=directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            if created is not None:
+                created.append(photo_hash)
+
+        return self.reference(photo_hash, content_type, len(data))
+
+    def reference(self, photo_hash, content_type, size):
+        """The document stored in a report's photos list"""
+        return {
+            'hash': photo_hash,
+            'contentType': content_type,
+            'size': size,
+            'url': f'/api/photos/{photo_hash}'
+        }
+
+    def delete(self, photo_hash):
+        """Remove a stored blob; the caller checks that no report references it"""
+        try:
+            os.remove(self.path_for(photo_hash))
+        except FileNotFoundError:
+            pass
+
+    def content_type(self, photo_hash):
+        """Sniff the stored blob's MIME type"""
+        with open(self.path_for(photo_hash), 'rb') as f:
+            return sniff_content_type(f.read(16)) or 'application/octet-stream'
+
+    def store_photos(self, photos, created=None):
+        """Replace data URLs in a report's photo list with stored references.
+
+        Entries that are already references (dicts with the hash of a stored
+        photo) are rebuilt from the store rather than trusted. Hashes of blobs
+        written by this call are appended to created.
+        """
+        references = []
+        for photo in photos or []:
+            if isinstance(photo, dict):
+                photo_hash = str(photo.get('hash', ''))
+                if not PHOTO_HASH_PATTERN.fullmatch(photo_hash) or not self.exists(photo_hash):
+                    raise PhotoError('Unknown photo reference')
+                size = os.path.getsize(self.path_for(photo_hash))
+                references.append(self.reference(photo_hash, self.content_type(photo_hash), size))
+            elif isinstance(photo, str):
+                references.append(self.save(decode_data_url(photo), created))
+            else:
+                raise PhotoError('Unsupported photo format')
+        return references
@@ -8,6 +8,7 @@ from pymongo import MongoClient
 from datetime import datetime
 import bcrypt
 import json
+from counters import reconcile_stats
 import os
 
 # MongoDB connection
@@ -153,6 +154,10 @@ def setup_database():
             result = reports_collection.insert_many(sample_reports)
             print(f"✅ Added {len(result.inserted_ids)} sample reports")
         
+        # Sample data was inserted directly, so rebuild the dashboard counters
+        reconcile_stats(db)
+        print("🧮 Dashboard counters reconciled")
+        
         print("\n🎉 Database setup completed successfully!")
         print("\n📋 Summary:")
         print(f"   • Reports: {reports_collection.count_documents({})}")
@@ -0,0 +1,92 @@
+"""
+Severity classifier for the Disaster Alert System
+Keyword and disaster-type rules are read from data/severity_rules.json and
+compiled into a single regex, so a description is scanned once no matter
+how many keywords are configured.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+SEVERITY_RULES_PATH = os.environ.get(
+    'SEVERITY_RULES_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'severity_rules.json')
+)
+
+logger = logging.getLogger('disaster_alert.severity')
+
+class SeverityClassifier:
+    """Compiled severity rules; levels are ordered from most to least severe"""
+
+    def __init__(self, rules, version=None):
+        self.version = version
+        self.levels = rules['levels']
+        self.rank = {level: i for i, level in enumerate(self.levels)}
+        self.default = rules.get('default', self.levels[-1])
+
+        # One named group per level: (?P<high>major|severe|...)|(?P<medium>...)
+        groups = []
+        for level in self.levels:
+            keywords = sorted(rules.get('keywords', {}).get(level, []), key=len, reverse=True)
+            if keywords:
+                alternation = '|'.join(re.escape(keyword.lower()) for keyword in keywords)
+                groups.append(f'(?P<{level}>{alternation})')
+        self.pattern = re.compile('|'.join(groups), re.IGNORECASE) if groups else None
+
+        self.type_levels = {}
+        for level in reversed(self.levels):
+            for disaster_type in rules.get('disasterTypes', {}).get(level, []):
+                self.type_levels[disaster_type.lower()] = level
+
+    @classmethod
+    def load(cls, path=SEVERITY_RULES_PATH):
+        """Load and compile rules from a JSON file"""
+        with open(path, 'rb') as f:
+            raw = f.read()
+        return cls(json.loads(raw), version=hashlib.sha1(raw).hexdigest()[:12])
+
+    def classify(self, disaster_type, description):
+        """Return the severity level for a report's type and description"""
+        found = None
+        if self.pattern is not None:
+            for match in self.pattern.finditer(description or ''):
+                level = match.lastgroup
+                if found is None or self.rank[level] < self.rank[found]:
+                    found = level
+                    if self.rank[found] == 0:
+                        break
+        if found:
+            return found
+
+        return self.type_levels.get((disaster_type or '').lower(), self.default)
+
+class SeverityRules:
+    """Holds the current classifier and recompiles it when the rules file changes"""
+
+    def __init__(self, path=SEVERITY_RULES_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = os.stat(path).st_mtime
+        self.classifier = SeverityClassifier.load(path)
+
+    def current(self):
+        """Return the classifier, reloading it first if the rules file was edited"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return self.classifier
+
+        if mtime != self.mtime:
+            with self.lock:
+                if mtime != self.mtime:
+                    try:
+                        self.classifier = SeverityClassifier.load(self.path)
+                        logger.info("Severity rules reloaded (version %s)", self.classifier.version)
+                    except (OSError, ValueError, KeyError, re.error) as e:
+                        logger.warning("Severity rules reload failed, keeping previous rules: %s", e)
+                    self.mtime = mtime
+        return self.classifier
@@ -0,0 +1,11 @@
+"""
+WSGI entry point for the Disaster Alert System
+Production servers import `app` from here, e.g.
+    gunicorn -c gunicorn.conf.py wsgi:app
+create_app() runs in each worker process, so every worker gets its own
+MongoDB client and email outbox threads.
+"""
+
+from app import create_app
+
+app = create_app()